@@ -0,0 +1,181 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from readindex import abbreviate, gather
+
+"""
+Module building the "also likes" graph of Task 6.
+
+The graph links the readers of a document to every document they read. For popular documents that is thousands of
+readers and documents, which Graphviz cannot lay out, so AlsoLikesGraph builds it on integer codes and can prune it:
+
+    top          keep the top N documents by co-read count, i.e. by how many readers of the input document read them
+    min_support  drop documents co-read by fewer readers than this
+    max_readers  keep at most this many readers, the ones who read the most documents kept
+
+Every node is emitted once, and every edge once with the number of read events of its reader and document as weight.
+Nodes and edges are generated from the numpy arrays of codes as the DOT source is written, line by line, to a file,
+rather than built in memory, ready to be rendered with Graphviz.
+"""
+
+# Colour of the input document and input user
+HIGHLIGHT = '#3ab125'
+
+# Nodes and weighted edges of a graph, as iterators consumed once by write. Nodes are (name, label, attributes), edges
+# are (tail, head, weight), and the legend is the label of an edge from a Readers to a Documents node.
+Graph = namedtuple('Graph', ['nodes', 'edges', 'legend'])
+
+
+def quote(value: str) -> str:
+    """Quote a DOT identifier or label"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _attributes(attributes: dict) -> str:
+    return ' '.join(f'{key}={quote(value)}' for key, value in attributes.items())
+
+
+class AlsoLikesGraph:
+    """
+    Builds pruned also likes graphs from a ReadIndex
+
+    Parameters
+    ----------
+    index: readindex.ReadIndex
+        Reader and document codes of the dataset
+
+    top: int, optional
+        Number of documents kept besides the input document, by co-read count. Default is None, which keeps them all.
+
+    min_support: int, optional
+        Smallest co-read count of a document kept. Default is 1, which keeps them all.
+
+    max_readers: int, optional
+        Number of readers kept besides the input user. Default is None, which keeps them all.
+
+    Methods
+    -------
+    build(document: int, user_uuid: str, size: str)
+        Returns iterators over the nodes and weighted edges of the graph of a document
+
+    write(graph: Graph, path: str)
+        Writes the DOT source of a graph to a file
+    """
+
+    def __init__(self, index, top=None, min_support=1, max_readers=None):
+        for name, value in (('top', top), ('min_support', min_support), ('max_readers', max_readers)):
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must not be negative.")
+        self.index = index
+        self.top = top
+        self.min_support = min_support
+        self.max_readers = max_readers
+
+    def _documents(self, document, readers) -> np.ndarray:
+        """Codes of the documents kept, besides document, ordered by co-read count then by first appearance"""
+        documents = gather(self.index.reads, readers)
+        documents = documents[documents != document]
+        positions, distinct = pd.factorize(documents)
+        counts = np.bincount(positions, minlength=len(distinct))
+        # A stable sort keeps documents with the same count in order of first appearance
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] >= self.min_support]
+        if self.top is not None:
+            order = order[:self.top]
+        return np.asarray(distinct, dtype=np.int32)[order]
+
+    def _readers(self, readers, kept) -> np.ndarray:
+        """Codes of the readers kept, the ones who read the most of the kept documents first if some are dropped"""
+        if self.max_readers is None or len(readers) <= self.max_readers:
+            return readers
+        # Number of kept documents read by every reader, counted over the gathered documents of all of them
+        lengths = np.diff(self.index.reads.indptr)[readers]
+        owners = np.repeat(np.arange(len(readers)), lengths)
+        hits = np.bincount(owners[np.isin(gather(self.index.reads, readers), kept)], minlength=len(readers))
+        return readers[np.sort(np.argsort(-hits, kind='stable')[:self.max_readers])]
+
+    def _nodes(self, document, documents, readers, user, user_uuid):
+        """Nodes of the graph, in the order they should be written"""
+        index = self.index
+        # Nodes are named after codes, so distinct IDs are never merged, and labelled with abbreviated IDs
+        reader_labels = abbreviate(list(index.reader_ids[readers]) + ([user_uuid] if user_uuid else []))
+        document_labels = abbreviate(index.document_ids[np.concatenate([[document], documents])])
+
+        # Show relation between nodes
+        yield 'Readers', 'Readers', {'color': 'white'}
+        yield 'Documents', 'Documents', {'color': 'white'}
+        yield f'd{document}', document_labels[0], {'style': 'filled', 'fillcolor': HIGHLIGHT}
+        if user_uuid:
+            yield f'r{user}', reader_labels[-1], {'style': 'filled', 'fillcolor': HIGHLIGHT, 'shape': 'box'}
+        for reader, label in zip(readers.tolist(), reader_labels):
+            yield f'r{reader}', label, {'shape': 'box'}
+        for item, label in zip(documents.tolist(), document_labels[1:]):
+            yield f'd{item}', label, {'shape': 'circle'}
+
+    @staticmethod
+    def _edges(document, user, user_uuid, owners, items, weights):
+        """Weighted edges of the graph, the one of the input user first"""
+        if user_uuid:
+            yield f'r{user}', f'd{document}', 1
+        for reader, item, weight in zip(owners.tolist(), items.tolist(), weights.tolist()):
+            yield f'r{reader}', f'd{item}', weight
+
+    def build(self, document: int, user_uuid: str = None, size: str = '') -> Graph:
+        """
+        Nodes and weighted edges of the also likes graph of a document
+
+        Parameters
+        ----------
+        document: int
+            Code of the input document
+
+        user_uuid: str, optional
+            Input user ID. Their reads are not shown, only an edge to the input document.
+
+        size: str, optional
+            Label of the legend edge, e.g. the size of the dataset
+
+        Returns
+        -------
+        Graph
+            Iterators over the nodes, in the order they should be written, and over the edges, weighted by the
+            number of read events of the reader and document
+        """
+        index = self.index
+        user = index.reader_code(user_uuid) if user_uuid else -1
+        readers = index.readers(document)
+        readers = readers[readers != user]
+        documents = self._documents(document, readers)
+        kept = np.concatenate([[document], documents]).astype(np.int32)
+        readers = self._readers(readers, kept)
+
+        # Edges from every reader kept to every document kept that they read. reads holds every pair once, and
+        # read_counts the same pairs with their number of read events, which is the weight of the edge.
+        owners = np.repeat(readers, np.diff(index.reads.indptr)[readers])
+        items = gather(index.reads, readers)
+        weights = gather(index.read_counts, readers, values=True)
+        found = np.isin(items, kept)
+        owners, items, weights = owners[found], items[found], weights[found]
+        # Readers without any kept document are left out, like documents nobody kept read
+        readers = readers[np.isin(readers, owners)]
+        documents = documents[np.isin(documents, items)]
+        return Graph(self._nodes(document, documents, readers, user, user_uuid),
+                     self._edges(document, user, user_uuid, owners, items, weights), size)
+
+    @staticmethod
+    def write(graph: Graph, path: str) -> str:
+        """
+        Write the DOT source of a graph to path, one statement per line
+
+        Edges read more than once are drawn thicker and labelled with their weight.
+        """
+        with open(path, 'w') as f:
+            f.write('digraph {\n')
+            for name, label, attributes in graph.nodes:
+                f.write(f'\t{quote(name)} [label={quote(label)} {_attributes(attributes)}]\n')
+            f.write(f'\t{quote("Readers")} -> {quote("Documents")} [label={quote(graph.legend)}]\n')
+            for tail, head, weight in graph.edges:
+                attributes = f' [label={weight} penwidth={min(weight, 8)}]' if weight > 1 else ''
+                f.write(f'\t{quote(tail)} -> {quote(head)}{attributes}\n')
+            f.write('}\n')
+        return path
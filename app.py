@@ -28,3 +28,10 @@ class App(tk.Tk):
 
         # Set the controller for views
         view.set_controller(controller)
+
+        # Stop the controller's worker thread along with the window
+        def close():
+            controller.close()
+            self.destroy()
+
+        self.protocol('WM_DELETE_WINDOW', close)
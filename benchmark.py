@@ -0,0 +1,48 @@
+import argparse
+import time
+from data import read_chunks, concat_chunks, MODEL_COLUMNS, CHUNK_SIZE
+from decoders import DECODERS
+
+"""
+Benchmark the JSON decoder backends on the same Issuu file
+
+Each installed backend parses the whole file the same way data.get_data does, and its throughput is reported in
+lines per second. The results decide the order of decoders.PREFERENCE.
+
+Usage: python benchmark.py -f issuu_cw2.json [--all-columns] [--repeat 3]
+"""
+
+
+def benchmark(file_name: str, decoder: str, columns=MODEL_COLUMNS, chunksize=CHUNK_SIZE) -> tuple:
+    """
+    Parse file_name with one decoder backend
+
+    Returns
+    -------
+    tuple
+        Number of lines parsed and seconds taken
+    """
+    tic = time.perf_counter()
+    with open(file_name, 'rb') as f:
+        df = concat_chunks(read_chunks(f, columns, chunksize, decoder), columns)
+    toc = time.perf_counter()
+    return len(df), toc - tic
+
+
+def main():
+    my_parser = argparse.ArgumentParser(description='Compare JSON decoder backends')
+    my_parser.add_argument('-f', '--file_name', type=str, required=True, help='File name containing JSON data')
+    my_parser.add_argument('--all-columns', action='store_true', help='Keep every field instead of MODEL_COLUMNS')
+    my_parser.add_argument('--repeat', type=int, default=3, help='Runs per backend, the best one is reported')
+    args = my_parser.parse_args()
+
+    columns = None if args.all_columns else MODEL_COLUMNS
+    print(f'{"decoder":<10}{"lines":>12}{"seconds":>12}{"lines/s":>14}')
+    for name in DECODERS:
+        runs = [benchmark(args.file_name, name, columns) for _ in range(args.repeat)]
+        lines, seconds = min(runs, key=lambda run: run[1])
+        print(f'{name:<10}{lines:>12}{seconds:>12.3f}{lines / seconds:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
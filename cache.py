@@ -0,0 +1,413 @@
+import hashlib
+import json
+import os
+import time
+from urllib import request
+from urllib.error import HTTPError
+from download import iter_lines, ranged_lines, BLOCK_SIZE
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+"""
+Module for caching parsed datasets on disk.
+
+Parsing a large JSON file takes far longer than reading back a columnar snapshot of the resulting dataframe, so
+after the first load the dataframe is written to a cache directory. Snapshots are Parquet files when pyarrow is
+installed and compressed numpy .npz archives otherwise. They are keyed by a fingerprint of the input file, so a
+changed file is simply a cache miss, and the least recently used snapshots are evicted once the directory grows
+past its size limit.
+
+Datasets loaded from a url are also kept locally, together with their ETag and Last-Modified headers. Later loads
+ask the server whether the file changed, and on a 304 Not Modified the local copy (and its snapshot) is used.
+
+"""
+
+# Default location of the cache, can be overridden with the ISSUU_CACHE_DIR environment variable
+CACHE_DIR = os.environ.get('ISSUU_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'issuu'))
+
+# Default size limit of the cache directory
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Bytes hashed from the start and from the end of the input file
+SAMPLE_BYTES = 1024 ** 2
+
+# Bump whenever the snapshot layout changes so old snapshots are ignored
+FORMAT_VERSION = 1
+
+EXTENSIONS = ('.parquet', '.npz')
+
+
+def fingerprint(path: str, options=()) -> str:
+    """
+    Create a cache key for a file
+
+    The key combines the absolute path, size and modification time of the file with a hash of its first and last
+    megabyte, so edits are noticed without reading all of a multi-gigabyte file.
+
+    Parameters
+    ----------
+    path: str
+        Input file
+
+    options: tuple, optional
+        Anything else that changes the parsed result, e.g. the projected columns and the schema
+
+    Returns
+    -------
+    str
+        Hex digest identifying this version of the file
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((FORMAT_VERSION, os.path.abspath(path), stat.st_size, stat.st_mtime_ns, options)).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def save_npz(df: pd.DataFrame, path: str):
+    """
+    Write df to a .npz archive without pickling
+
+    Categorical and string columns are stored as integer codes plus their distinct values, nullable integers as
+    values plus a mask, and numeric columns as they are. A json manifest records the original dtypes.
+    """
+    arrays = {}
+    manifest = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind = 'category'
+            arrays[f'{i}_codes'] = series.cat.codes.to_numpy()
+            arrays[f'{i}_values'] = _plain_array(series.cat.categories)
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series):
+            kind = 'nullable'
+            arrays[f'{i}_values'] = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            arrays[f'{i}_mask'] = series.isna().to_numpy()
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            kind = 'numeric'
+            arrays[f'{i}_values'] = series.to_numpy()
+        else:
+            # Strings (and anything else) are dictionary encoded
+            kind = 'strings'
+            codes, uniques = pd.factorize(series)
+            arrays[f'{i}_codes'] = codes
+            arrays[f'{i}_values'] = np.asarray(uniques, dtype=str)
+        manifest.append({'name': str(column), 'kind': kind, 'dtype': str(series.dtype)})
+    arrays['manifest'] = np.array(json.dumps(manifest))
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+
+def load_npz(path: str) -> pd.DataFrame:
+    """Read a dataframe written by save_npz"""
+    with np.load(path, allow_pickle=False) as archive:
+        manifest = json.loads(str(archive['manifest']))
+        columns = {}
+        for i, entry in enumerate(manifest):
+            kind = entry['kind']
+            if kind == 'category':
+                values = pd.Categorical.from_codes(archive[f'{i}_codes'], archive[f'{i}_values'])
+            elif kind == 'nullable':
+                values = pd.arrays.IntegerArray(archive[f'{i}_values'], archive[f'{i}_mask'])
+            elif kind == 'numeric':
+                values = archive[f'{i}_values']
+            else:
+                codes = archive[f'{i}_codes']
+                values = np.empty(len(codes), dtype=object)
+                present = codes != -1
+                values[present] = archive[f'{i}_values'].astype(object)[codes[present]]
+                values = pd.array(values, dtype=entry['dtype'])
+            columns[entry['name']] = values
+    return pd.DataFrame(columns)
+
+
+def evict_files(directory: str, extensions: tuple, max_bytes: int, keep=None, companions=()):
+    """
+    Delete the least recently used files in directory until the ones left fit in max_bytes
+
+    Parameters
+    ----------
+    directory: str
+        Folder to clean up
+
+    extensions: tuple
+        Only files with these extensions are considered
+
+    max_bytes: int
+        Size limit
+
+    keep: str, optional
+        Name (without extension) of a file that must not be evicted, e.g. the one just written
+
+    companions: tuple, optional
+        Extensions of files that go with each evicted file, e.g. its headers, and are deleted along with it
+    """
+    if not os.path.isdir(directory):
+        return
+    # Access time counts too, since the url cache marks bodies as used without changing their modification time
+    files = sorted((entry for entry in os.scandir(directory) if entry.name.endswith(extensions)),
+                   key=lambda entry: max(entry.stat().st_atime, entry.stat().st_mtime))
+    total = sum(entry.stat().st_size for entry in files)
+    for entry in files:
+        if total <= max_bytes:
+            break
+        if os.path.splitext(entry.name)[0] == keep:
+            continue
+        total -= entry.stat().st_size
+        os.remove(entry.path)
+        for extension in companions:
+            companion = os.path.splitext(entry.path)[0] + extension
+            if os.path.exists(companion):
+                os.remove(companion)
+
+
+def _plain_array(index: pd.Index) -> np.ndarray:
+    """Categories as a numpy array that np.savez can store without pickling"""
+    if pd.api.types.is_numeric_dtype(index):
+        return index.to_numpy()
+    return np.asarray(index, dtype=str)
+
+
+class DatasetCache:
+    """
+    Size bounded cache of parsed dataframes on disk
+
+    Parameters
+    ----------
+    directory: str, optional
+        Folder that holds the snapshots. Created when needed.
+
+    max_bytes: int, optional
+        Once the snapshots take more space than this, the least recently used ones are deleted
+
+    rebuild: bool, optional
+        Default is False. When True, existing snapshots are never read but new ones are still written, which
+        rebuilds the cache.
+
+    Methods
+    -------
+    load(key: str)
+        Returns the cached dataframe for key, or None
+
+    store(key: str, df: pd.DataFrame)
+        Writes a snapshot of df and evicts old snapshots if needed
+
+    evict(keep: str)
+        Deletes least recently used snapshots until the cache fits in max_bytes
+
+    clear
+        Deletes every snapshot
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, rebuild=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+        # Snapshots are written in the best format available
+        self.extension = '.parquet' if pyarrow is not None else '.npz'
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def _snapshots(self) -> list:
+        """All snapshot files in the cache directory"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(EXTENSIONS)]
+
+    def load(self, key: str):
+        """
+        Read the snapshot stored under key
+
+        Returns
+        -------
+        pd.DataFrame or None
+            None when there is no snapshot for key or rebuild was requested
+        """
+        if self.rebuild:
+            return None
+        for extension in EXTENSIONS:
+            path = self._path(key, extension)
+            if not os.path.exists(path):
+                continue
+            if extension == '.parquet':
+                if pyarrow is None:
+                    continue
+                df = pd.read_parquet(path)
+            else:
+                df = load_npz(path)
+            # Mark as recently used for eviction
+            os.utime(path)
+            return df
+        return None
+
+    def store(self, key: str, df: pd.DataFrame):
+        """Write a snapshot of df under key, then make room for it"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, self.extension)
+        # Write to a temporary file first so an interrupted write never leaves a broken snapshot behind
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            if self.extension == '.parquet':
+                df.to_parquet(temporary, index=False)
+            else:
+                save_npz(df, temporary)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used snapshots until the cache fits in max_bytes
+
+        Parameters
+        ----------
+        keep: str, optional
+            Key that must not be evicted, i.e. the snapshot that was just written
+        """
+        evict_files(self.directory, EXTENSIONS, self.max_bytes, keep)
+
+    def clear(self):
+        """Delete every snapshot"""
+        for entry in self._snapshots():
+            os.remove(entry.path)
+
+
+class HttpCache:
+    """
+    Size bounded local copies of url bodies, revalidated with conditional GET requests
+
+    Parameters
+    ----------
+    directory: str, optional
+        Folder that holds the bodies and their headers. Created when needed.
+
+    max_bytes: int, optional
+        Once the bodies take more space than this, the least recently used ones are deleted
+
+    Methods
+    -------
+    open(url: str, threads: int)
+        Returns the path of the local copy of url, and the lines of a new body to parse if it changed
+
+    fetch(url: str)
+        Returns the path of an up to date local copy of url
+
+    path(url: str)
+        Returns the path of the local copy of url, which may not exist yet
+    """
+
+    def __init__(self, directory=os.path.join(CACHE_DIR, 'http'), max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _paths(self, url: str) -> tuple:
+        """Body and header files for url"""
+        key = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, key + '.body'), os.path.join(self.directory, key + '.json'), key
+
+    def path(self, url: str) -> str:
+        """Path of the local copy of url, whether it was downloaded yet or not"""
+        return self._paths(url)[0]
+
+    def open(self, url: str, threads=None, block_size=BLOCK_SIZE) -> tuple:
+        """
+        Revalidate the local copy of url, or start downloading a new one
+
+        If there is a local copy, the request carries If-None-Match and If-Modified-Since. A 304 answer means the
+        copy is still valid and nothing is downloaded. Otherwise the lines of the body are returned as they arrive,
+        so they can be parsed while downloading, and are written to disk at the same time. Once every line was read
+        the copy is stored with its validators.
+
+        Parameters
+        ----------
+        url: str
+            Url of a JSON lines file
+
+        threads: int, optional
+            Number of parallel connections for a new download, see download.ranged_lines. Default is None, which
+            uses a single one.
+
+        block_size: int, optional
+            Number of bytes read from the response at a time
+
+        Returns
+        -------
+        tuple
+            Path of the local copy, and None if it is up to date or an iterator over the lines of the new body
+        """
+        body_path, headers_path, key = self._paths(url)
+        validators = {}
+        if os.path.exists(body_path) and os.path.exists(headers_path):
+            with open(headers_path) as f:
+                validators = json.load(f)
+
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        try:
+            response = request.urlopen(request.Request(url, headers=headers))
+        except HTTPError as error:
+            if error.code != 304 or not headers:
+                raise
+            print("Remote file not modified, using local copy")
+            # Mark as recently used for eviction. Only the access time changes, so the fingerprint of the body,
+            # and with it the key of its parsed snapshot, stays the same.
+            os.utime(body_path, ns=(time.time_ns(), os.stat(body_path).st_mtime_ns))
+            return body_path, None
+
+        validators = {'url': url, 'etag': response.headers.get('ETag'),
+                      'last_modified': response.headers.get('Last-Modified')}
+        if threads is not None and threads > 1:
+            # The body is downloaded again as parallel ranged segments, this response only gave its validators
+            response.close()
+            lines = ranged_lines(url, threads, block_size=block_size)
+        else:
+            lines = _response_lines(response, block_size)
+        return body_path, self._tee(lines, body_path, headers_path, key, validators)
+
+    def _tee(self, lines, body_path: str, headers_path: str, key: str, validators: dict):
+        """Yield lines while writing them to a temporary file, which becomes the local copy once they are all read"""
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f'{body_path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                for line in lines:
+                    f.write(line + b'\n')
+                    yield line
+            os.replace(temporary, body_path)
+        finally:
+            # Left behind if the download or the parse stopped early
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        with open(headers_path, 'w') as f:
+            json.dump(validators, f)
+        evict_files(self.directory, ('.body',), self.max_bytes, keep=key, companions=('.json',))
+
+    def fetch(self, url: str, threads=None) -> str:
+        """Make sure the local copy of url is up to date, downloading it if needed, and return its path"""
+        path, lines = self.open(url, threads)
+        if lines is not None:
+            for _ in lines:
+                pass
+        return path
+
+
+def _response_lines(response, block_size: int):
+    """Lines of an open response, closing it once they are all read"""
+    with response:
+        yield from iter_lines(response, block_size)
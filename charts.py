@@ -0,0 +1,77 @@
+from matplotlib.ticker import PercentFormatter
+from histograms import top_counts
+
+"""
+Module drawing the charts of Tasks 2a, 2b, 3a and 3b.
+
+Each function draws counts, as computed by the Model, on a figure and axis it is given, so the same drawing code is
+used by the interactive GUI, which creates a figure and shows it, and by report.py, which reuses one figure per chart
+and saves it to files.
+
+Counts are drawn as bar charts, one bar per value, largest first. With top, only the top values get a bar of their own
+and the others are summed into one "Other" bar, so a chart has a bounded number of bars whatever the dataset.
+"""
+
+# Figure size in inches of every chart
+FIGSIZE = {'countries': (6, 6), 'continents': (6, 6), 'long_browsers': (10, 6), 'short_browsers': (8, 6)}
+
+# Default number of values with a bar of their own, the others are summed into one bar
+TOP = 20
+
+
+def chart_top(args: dict):
+    """Number of bars of their own from the --chart-top option, None to draw every value"""
+    top = args.get('chart_top')
+    if top is None:
+        return TOP
+    return top if top > 0 else None
+
+
+def _bars(ax, counts, top, horizontal=False):
+    """Draw counts as bars, largest first"""
+    counts = top_counts(counts, top)
+    labels = [str(label) for label in counts.index]
+    if horizontal:
+        # Long labels are easier to read on the vertical axis, with the largest bar on top
+        ax.barh(labels, counts.to_numpy())
+        ax.invert_yaxis()
+    else:
+        ax.bar(labels, counts.to_numpy())
+        ax.tick_params(axis='x', labelrotation=90 if len(labels) > 8 else 0)
+
+
+def countries(fig, ax, counts, document: str, top=TOP):
+    """Draw the number of viewers per country of a document"""
+    fig.suptitle(f'Views by Country for file:\n{document}')
+    _bars(ax, counts, top)
+    ax.set_title('Countries')
+    ax.set(ylabel='Count')
+
+
+def continents(fig, ax, counts, document: str, top=TOP):
+    """Draw the number of viewers per continent of a document"""
+    fig.suptitle(f'Views by Continent for file:\n{document}')
+    _bars(ax, counts, top)
+    ax.set_title('Continents')
+    ax.set(ylabel='Count')
+
+
+def long_browsers(fig, ax, counts, top=TOP):
+    """Draw the number of rows per full useragent string"""
+    fig.suptitle('Long Browser Names')
+    _bars(ax, counts, top, horizontal=True)
+    ax.set_title('User Agent')
+    ax.set(xlabel='Count')
+    fig.tight_layout()
+
+
+def short_browsers(fig, ax, counts, top=TOP):
+    """Draw the share of rows per short browser name"""
+    fig.suptitle('Short Browser Names')
+    if counts.empty or not counts.sum():
+        # Nothing to draw, and no total to divide by
+        return
+    # Divide each count by total observations to get percentage
+    _bars(ax, counts / counts.sum(), top)
+    ax.set(ylabel='Percentage')
+    ax.yaxis.set_major_formatter(PercentFormatter(1))
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -23,6 +24,21 @@ class Convert:
     map_to_continent_name(df: pd.DataFrame)
         Maps continent names to visitor_country
 
+    continent_index_many(countries: array-like, errors: str)
+        Converts many country codes to positions in continent_codes and continent_names
+
+    to_continent_code_many(countries: array-like, errors: str)
+        Converts many country codes to continent codes
+
+    to_continent_name_many(codes: array-like, errors: str)
+        Converts many continent codes to continent names
+
+    Notes
+    -----
+    The batch methods never convert the same string twice. They look up each distinct value once, in a 26x26 table
+    indexed by the two letters of the code, then broadcast the result back through the codes of the distinct values.
+    With errors='raise' unrecognized codes raise a KeyError, with errors='coerce' they become missing. Missing
+    values are always returned as missing.
     """
 
     def __init__(self):
@@ -284,6 +300,18 @@ class Convert:
             'AN': 'Antarctica'
         }
 
+        # Compiled lookup tables for the batch methods
+        self.continent_codes = np.array(list(self._code_to_continent), dtype=object)
+        self.continent_names = np.array(list(self._code_to_continent.values()), dtype=object)
+        positions = {code: i for i, code in enumerate(self.continent_codes)}
+        # Position of the continent of every country, indexed by the two letters of its code, -1 if unknown
+        self._country_table = np.full((26, 26), -1, dtype=np.int8)
+        for country, continent in self._country_to_continent.items():
+            self._country_table[ord(country[0]) - ord('A'), ord(country[1]) - ord('A')] = positions[continent]
+        self._continent_table = np.full((26, 26), -1, dtype=np.int8)
+        for code, i in positions.items():
+            self._continent_table[ord(code[0]) - ord('A'), ord(code[1]) - ord('A')] = i
+
     def to_continent_code(self, country: str) -> str:
         """
 
@@ -342,8 +370,8 @@ class Convert:
         """
         Convert country code to continent code
 
-        Take a dataframe and map the country_to_continent code dictionary on its 'visitor_country' column.
-        Afterwards, map the code_to_continent name dictionary on 'visitor_country'.
+        Take a dataframe and convert its 'visitor_country' column to continent names, going through the
+        compiled lookup table once instead of mapping codes and then names.
 
         Parameters
         ----------
@@ -356,20 +384,16 @@ class Convert:
             Dataframe where country codes have been replaced with continent names
 
         """
-        # Map the dictionary to replace values
-        series = df.visitor_country.map(self._country_to_continent)
-
-        # Map results in a series, so convert into DataFrame, convert continent codes to names and return it
-        code_df = pd.DataFrame(series).reset_index()
-        code_df.columns = ['index', 'visitor_country']
-        return self.map_to_continent_name(code_df)
+        # Country codes straight to continent names, in one pass over the distinct countries. Unknown ones are NaN.
+        positions = self.continent_index_many(df.visitor_country, errors='coerce')
+        names = np.append(self.continent_names, np.nan)[positions]
+        return pd.DataFrame({'index': np.arange(len(df)), 'visitor_country': names})
 
     def map_to_continent_name(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Convert continent code to continent name
 
-        Take a series, convert it to dataframe and map the code_to_continent name dictionary on its
-        'visitor_country' column.
+        Take a dataframe and look up the continent name of every code in its 'visitor_country' column.
 
         Parameters
         ----------
@@ -382,10 +406,92 @@ class Convert:
             Dataframe where continent codes have been replaced with continent names
 
         """
-        # Map returns a series
-        series = df.visitor_country.map(self._code_to_continent)
+        positions = self._lookup_many(self._continent_table, df.visitor_country, 'coerce', '')
+        names = np.append(self.continent_names, np.nan)[positions]
+        return pd.DataFrame({'index': np.arange(len(df)), 'visitor_country': names})
+
+    @staticmethod
+    def _table_lookup(table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Look up two letter codes in a 26x26 table, -1 for anything that is not two capital letters"""
+        codes = np.asarray(codes, dtype=str)
+        result = np.full(len(codes), -1, dtype=np.int8)
+        two = np.char.str_len(codes) == 2
+        # Each character of a fixed width unicode array is one uint32 code point
+        letters = codes[two].astype('U2').view(np.uint32).reshape(-1, 2).astype(np.int64) - ord('A')
+        valid = ((letters >= 0) & (letters < 26)).all(axis=1)
+        found = np.full(len(letters), -1, dtype=np.int8)
+        found[valid] = table[letters[valid, 0], letters[valid, 1]]
+        result[two] = found
+        return result
+
+    def _lookup_many(self, table: np.ndarray, values, errors: str, message: str) -> np.ndarray:
+        """Look up each distinct value once and broadcast the positions back to every value"""
+        if errors not in ('raise', 'coerce'):
+            raise ValueError("errors must be 'raise' or 'coerce'.")
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            # Categorical columns already hold one code per distinct value
+            codes, uniques = np.asarray(pd.Series(values).array.codes), pd.Series(values).cat.categories
+        else:
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        # -1 codes are missing values, they index the appended -1
+        positions = np.append(self._table_lookup(table, np.asarray(uniques, dtype=object)), -1)[codes]
+        if errors == 'raise':
+            unknown = (positions < 0) & (codes >= 0)
+            if unknown.any():
+                raise KeyError(f"{message}: {', '.join(map(str, pd.unique(uniques[codes[unknown]])))}")
+        return positions
+
+    def continent_index_many(self, countries, errors='raise') -> np.ndarray:
+        """
+        Convert many country codes at once to positions in continent_codes and continent_names
+
+        Parameters
+        ----------
+        countries: array-like
+            Two letter ISO-3166 country codes, e.g. a visitor_country column, plain or categorical
 
-        # Convert series to df and return it
-        name_df = pd.DataFrame(series).reset_index()
-        name_df.columns = ['index', 'visitor_country']
-        return name_df
+        errors: str, optional
+            'raise' (default) raises for unrecognized country codes, 'coerce' gives them position -1
+
+        Raises
+        ------
+        KeyError
+            If errors is 'raise' and a country code is not recognized
+
+        Returns
+        -------
+        numpy.ndarray
+            Position of the continent of every country, -1 where the country is missing or coerced
+        """
+        return self._lookup_many(self._country_table, countries, errors, "Country code not recognized")
+
+    def to_continent_code_many(self, countries, errors='raise') -> np.ndarray:
+        """
+        Convert many country codes to continent codes in one pass
+
+        Returns
+        -------
+        numpy.ndarray
+            Two letter continent codes, None where the country is missing or coerced
+        """
+        return np.append(self.continent_codes, None)[self.continent_index_many(countries, errors)]
+
+    def to_continent_name_many(self, codes, errors='raise') -> np.ndarray:
+        """
+        Convert many continent codes to continent names in one pass
+
+        Parameters
+        ----------
+        codes: array-like
+            Two letter continent codes
+
+        errors: str, optional
+            'raise' (default) raises for unrecognized continent codes, 'coerce' makes them None
+
+        Returns
+        -------
+        numpy.ndarray
+            Continent names, None where the code is missing or coerced
+        """
+        positions = self._lookup_many(self._continent_table, codes, errors, "Continent code not recognized")
+        return np.append(self.continent_names, None)[positions]
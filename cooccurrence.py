@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from readindex import CSR
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+"""
+Module for precomputed document co-occurrence counts.
+
+The "also likes" tasks count, for an input document, how many of its readers read every other document. Doing that
+per query means walking the documents of every reader. The read events of a dataset are already grouped into two
+sparse incidence matrices over integer reader and document codes by readindex.ReadIndex:
+
+    R[r, d] = 1 if reader r read document d (any environment)
+    A[r, d] = 1 if reader r read document d in the reader environment
+
+and this module computes the document co-occurrence matrix C = R^T A once, so that C[d, e] is the number of readers
+of d who also read e. Any document's also likes counts are then one row of C. Excluding the input user only
+subtracts their row of A.
+
+The product is computed with scipy.sparse when it is installed. Otherwise the same CSR arrays are built with numpy
+from a pandas merge of the two incidence lists, which gives identical results.
+"""
+
+
+def _product(readers_of: CSR, reads: CSR, n_documents: int) -> CSR:
+    """C = R^T A with numpy, joining both incidence lists on the reader and counting each pair of documents"""
+    # Expand both matrices back into (reader, document) lists
+    left = pd.DataFrame({'reader': readers_of.indices,
+                         'document': np.repeat(np.arange(readers_of.shape[0]), np.diff(readers_of.indptr))})
+    right = pd.DataFrame({'reader': np.repeat(np.arange(reads.shape[0]), np.diff(reads.indptr)),
+                          'also': reads.indices})
+    pairs = left.merge(right, on='reader')
+    counts = pairs.groupby(['document', 'also'], sort=True).size()
+    rows = counts.index.get_level_values('document').to_numpy()
+    indptr = np.zeros(n_documents + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_documents), out=indptr[1:])
+    return CSR(indptr, counts.index.get_level_values('also').to_numpy(np.int32), counts.to_numpy(np.int32),
+               (n_documents, n_documents))
+
+
+class Cooccurrence:
+    """
+    Sparse document co-occurrence counts over the read events of a dataset
+
+    Parameters
+    ----------
+    index: readindex.ReadIndex
+        Reader and document codes of the dataset, and who read what
+
+    Methods
+    -------
+    row(document: int, exclude: list)
+        Returns the codes of the documents also read by readers of a document, and their counts
+
+    readers(doc_uuid: str)
+        Returns every reader of a document
+
+    also_likes(doc_uuid: str, exclude: list)
+        Returns how many readers of a document read each other document
+
+    top(doc_uuid: str, k: int, exclude: list)
+        Returns the k documents read by most readers of a document
+    """
+
+    def __init__(self, index):
+        self.index = index
+        # Document -> readers, i.e. R transposed, and reader -> documents read in the reader environment, i.e. A
+        self.readers_of, self.reads = index.readers_of, index.reads
+        n_documents = len(index.document_ids)
+
+        if sparse is not None:
+            readers_of, reads = (sparse.csr_matrix((m.data, m.indices, m.indptr), shape=m.shape)
+                                 for m in (self.readers_of, self.reads))
+            counts = (readers_of @ reads).tocsr()
+            counts.sort_indices()
+            self.counts = CSR(counts.indptr, counts.indices, counts.data, counts.shape)
+        else:
+            self.counts = _product(self.readers_of, self.reads, n_documents)
+
+    @staticmethod
+    def _row(matrix: CSR, i: int) -> tuple:
+        """Column indices and values of row i"""
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        return matrix.indices[start:end], matrix.data[start:end]
+
+    def _document_code(self, doc_uuid: str) -> int:
+        code = self.index.document_code(doc_uuid)
+        if code < 0 or self.readers_of.indptr[code] == self.readers_of.indptr[code + 1]:
+            raise ValueError("No document found")
+        return code
+
+    def row(self, document: int, exclude=()) -> tuple:
+        """
+        Documents also read by the readers of a document, without the document itself and the excluded readers
+
+        Parameters
+        ----------
+        document: int
+            Code of the input document
+
+        exclude: list, optional
+            Codes of readers whose reads are not counted, e.g. the input user
+
+        Returns
+        -------
+        tuple
+            Sorted document codes and their number of readers
+        """
+        documents, counts = self._row(self.counts, document)
+        counts = counts.copy()
+        if len(exclude):
+            # Only readers of this document were counted, so only they can be taken off again
+            excluded = np.intersect1d(np.asarray(exclude), self._row(self.readers_of, document)[0])
+            for reader in excluded:
+                # Everything this reader read is in the row already, since they read the input document
+                counts[np.searchsorted(documents, self._row(self.reads, reader)[0])] -= 1
+        keep = (counts > 0) & (documents != document)
+        return documents[keep], counts[keep]
+
+    def _counts(self, doc_uuid: str, exclude=()) -> tuple:
+        """row() for IDs rather than codes"""
+        exclude = [code for code in self.index.reader_codes(exclude) if code >= 0]
+        return self.row(self._document_code(doc_uuid), exclude)
+
+    def readers(self, doc_uuid: str) -> list:
+        """Every distinct reader of doc_uuid, in order of first appearance"""
+        return list(self.index.reader_ids[self._row(self.readers_of, self._document_code(doc_uuid))[0]])
+
+    def also_likes(self, doc_uuid: str, exclude=()) -> dict:
+        """
+        Count how many readers of a document read each other document
+
+        Parameters
+        ----------
+        doc_uuid: str
+            Input document ID
+
+        exclude: list, optional
+            Readers whose reads are not counted, e.g. the input user
+
+        Returns
+        -------
+        dict
+            Full document IDs and their number of readers, in document code order
+
+        Raises
+        ------
+        ValueError
+            If the document was never read
+        """
+        documents, counts = self._counts(doc_uuid, exclude)
+        return dict(zip(self.index.document_ids[documents], counts.tolist()))
+
+    def top(self, doc_uuid: str, k=10, exclude=()) -> list:
+        """
+        The k documents read by most readers of doc_uuid, ties broken on document ID
+
+        Returns
+        -------
+        list
+            (document ID, number of readers) pairs, most read first
+        """
+        documents, counts = self._counts(doc_uuid, exclude)
+        if len(counts) > k:
+            # The k-th largest count and everything above it, without sorting the whole row
+            threshold = np.partition(counts, len(counts) - k)[len(counts) - k]
+            documents, counts = documents[counts >= threshold], counts[counts >= threshold]
+        ids = self.index.document_ids[documents]
+        order = sorted(range(len(ids)), key=lambda i: (-counts[i], ids[i]))[:k]
+        return [(ids[i], int(counts[i])) for i in order]
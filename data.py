@@ -1,8 +1,16 @@
+import bz2
+import gzip
+import lzma
 import os.path
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-import json
+from pandas.api.types import union_categoricals
 from urllib import request
 from timer import timer
+from decoders import get_decoder
+from cache import fingerprint
+from download import iter_lines, ranged_lines, BLOCK_SIZE
 
 """
 Module for converting JSON files into dataframes which can then be used by our program.
@@ -12,31 +20,309 @@ But because those functions were already created and tested, they're still inclu
 
 """
 
+# Fields of an Issuu event that the Model actually uses. Passing these as `columns` drops everything else on load.
+MODEL_COLUMNS = ('visitor_uuid', 'visitor_country', 'visitor_useragent', 'env_type', 'event_type',
+                 'event_readtime', 'subject_type', 'subject_doc_id')
+
+# Compact dtypes for the Model's columns. Low-cardinality strings become categories (integer codes plus one copy
+# of each distinct string) and the mostly empty read time becomes a nullable integer instead of float64.
+SCHEMA = {'visitor_country': 'category', 'visitor_useragent': 'category', 'env_type': 'category',
+          'event_type': 'category', 'subject_type': 'category', 'event_readtime': 'Int32'}
+
+# Number of JSON lines parsed into a single dataframe chunk
+CHUNK_SIZE = 100000
+
+# Leading bytes of each supported compression format and how to open it
+MAGIC_NUMBERS = ((b'\x1f\x8b', gzip.open), (b'BZh', bz2.open), (b'\xfd7zXZ\x00', lzma.open))
+
+
+def open_input(file: str):
+    """
+    Open a file for reading bytes, decompressing it on the fly if needed
+
+    The format is detected from the first bytes of the file rather than its extension, so gzip, bzip2 and xz
+    exports can be read directly without decompressing them to disk first.
+
+    Parameters
+    ----------
+    file: str
+        Plain or compressed JSON lines file
+
+    Returns
+    -------
+    file object
+        Binary file object yielding the uncompressed lines
+    """
+    opener = _compression(file)
+    if opener is not None:
+        return opener(file, 'rb')
+    return open(file, 'rb')
+
+
+def _compression(file: str):
+    """Decompressing open function of file (gzip, bz2 or lzma open) from its magic bytes, None if not compressed"""
+    with open(file, 'rb') as f:
+        head = f.read(6)
+    for magic, opener in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return opener
+    return None
+
+
+def split_ranges(file: str, parts: int) -> list:
+    """
+    Split a file into byte ranges that start and end on line boundaries
+
+    Parameters
+    ----------
+    file: str
+        Uncompressed JSON lines file
+
+    parts: int
+        Number of ranges wanted. Fewer are returned for files with fewer lines.
+
+    Returns
+    -------
+    list
+        (start, end) byte offsets covering the whole file in order
+    """
+    size = os.path.getsize(file)
+    boundaries = [0]
+    with open(file, 'rb') as f:
+        for i in range(1, parts):
+            # Jump to the approximate split point, then forward to the start of the next line
+            f.seek(max(size * i // parts, boundaries[-1]))
+            f.readline()
+            boundaries.append(f.tell())
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _read_range(f, start: int, end: int):
+    """Yield the lines of f that start in [start, end)"""
+    f.seek(start)
+    position = start
+    for line in f:
+        if position >= end:
+            break
+        position += len(line)
+        yield line
+
+
+def _parse_range(file: str, start: int, end: int, columns, chunksize, decoder, schema) -> pd.DataFrame:
+    """
+    Parse one byte range of file. Runs in a worker process.
+
+    With a schema the result is already typed, so the categorical columns travel back to the main process as
+    small code arrays rather than as strings.
+    """
+    with open(file, 'rb') as f:
+        return concat_chunks(read_chunks(_read_range(f, start, end), columns, chunksize, decoder, schema), columns,
+                             schema)
+
+
+def apply_schema(df: pd.DataFrame, schema=None) -> pd.DataFrame:
+    """
+    Cast the columns of df to the dtypes given in schema
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Dataframe whose columns need casting
+
+    schema: dict, optional
+        Mapping of column name to dtype. Default is None, which leaves df untouched. Columns not present in df are
+        ignored.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        New dataframe with cast columns, or df itself if nothing needed casting
+    """
+    casts = {}
+    for column, dtype in (schema or {}).items():
+        if column not in df or df[column].dtype == dtype:
+            continue
+        if dtype == 'category':
+            casts[column] = df[column].astype(dtype)
+        else:
+            # Read times are whole milliseconds but come out of JSON as floats because of the missing values
+            casts[column] = pd.to_numeric(df[column]).round().astype(dtype)
+    if not casts:
+        return df
+    # Assigning the casts into df would keep its original object block, strings and all, alive next to them.
+    # A new frame only references the columns it keeps.
+    return pd.DataFrame({column: casts.get(column, df[column]) for column in df.columns}, index=df.index)
+
+
+def category_mask(series: pd.Series, value) -> np.ndarray:
+    """
+    Boolean mask of the rows of series equal to value
+
+    For categorical columns the value is looked up once among the categories and only the integer codes are
+    compared, instead of comparing every row's string.
+
+    Parameters
+    ----------
+    series: pd.Series
+        Column to compare, categorical or not
+
+    value: str
+        Value to look for
+
+    Returns
+    -------
+    mask: np.ndarray
+        Array of bools, True where series equals value
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return (series == value).to_numpy()
+    code = series.cat.categories.get_indexer([value])[0]
+    # -1 is also the code of missing values, so an unknown value must not match them
+    if code == -1:
+        return np.zeros(len(series), dtype=bool)
+    # .array.codes is the codes array itself, e.g. a memory-mapped one, where .cat.codes would copy it
+    return series.array.codes == code
+
+
+def _union_categories(parts: list) -> pd.Categorical:
+    """Stack categorical chunks into one categorical with sorted categories"""
+    # A chunk where the field is always missing has float categories, so fall back to object ones
+    if len({part.categories.dtype for part in parts}) > 1:
+        parts = [pd.Categorical.from_codes(part.codes, part.categories.astype(object)) for part in parts]
+    return union_categoricals(parts, sort_categories=True)
+
+
+def read_chunks(lines, columns=None, chunksize=CHUNK_SIZE, decoder=None, schema=None):
+    """
+    Parse JSON lines into dataframes of at most chunksize rows
+
+    Only one chunk worth of raw lines is alive at any time, so memory stays bounded by chunksize rather
+    than by the number of lines. Each chunk is handed to a decoder backend from the decoders module.
+
+    Parameters
+    ----------
+    lines: iterable
+        Iterable of strings (or bytes), each one a JSON object. Blank lines are skipped.
+
+    columns: tuple, optional
+        Default is None, which keeps every field. Otherwise only these columns are kept, in this order.
+        Fields missing from an event are filled with NaN.
+
+    chunksize: int, optional
+        Maximum number of rows per chunk
+
+    decoder: str, optional
+        Name of the decoder backend. Default is None, which uses the fastest one installed.
+
+    schema: dict, optional
+        Dtypes each chunk is cast to, see apply_schema. Default is None, which keeps the dtypes pandas infers.
+
+    Yields
+    ------
+    chunk: pd.DataFrame
+        Dataframe for the next chunksize lines
+    """
+    decode = get_decoder(decoder)
+    batch = []
+    for line in lines:
+        if not line.strip():
+            continue
+        batch.append(line)
+        if len(batch) == chunksize:
+            yield apply_schema(decode(batch, columns), schema)
+            batch = []
+    if batch:
+        yield apply_schema(decode(batch, columns), schema)
+
+
+def concat_chunks(chunks, columns=None, schema=None) -> pd.DataFrame:
+    """
+    Concatenate dataframe chunks into one dataframe with a fresh index
+
+    Every chunk has its own categories, which pd.concat would turn back into object columns. Columns that are
+    categorical in all chunks are therefore stacked separately with union_categoricals.
+
+    Parameters
+    ----------
+    chunks: iterable
+        Dataframes produced by read_chunks
+
+    columns: tuple, optional
+        Columns of the result if there are no chunks at all (i.e. empty input)
+
+    schema: dict, optional
+        Dtypes of the result, see apply_schema. Only needed for columns that some chunks lack.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        All chunks stacked in order
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return apply_schema(pd.DataFrame(columns=columns), schema)
+
+    # Same column order pd.concat would give
+    order = list(dict.fromkeys(column for chunk in chunks for column in chunk.columns))
+    categorical = [column for column in order
+                   if all(column in chunk and isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks)]
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True, sort=False)
+    # Walking the columns in order keeps every insert position valid
+    for column in categorical:
+        df.insert(order.index(column), column, _union_categories([chunk[column].array for chunk in chunks]))
+    return apply_schema(df, schema)
+
 
 @timer
-def get_data(name: str, testing=False) -> pd.DataFrame:
+def get_data(name: str, testing=False, columns=None, chunksize=CHUNK_SIZE, decoder=None, schema=None,
+             cache=None, workers=None) -> pd.DataFrame:
     """
     Convert JSON data to Pandas Dataframe.
 
-    It converts all JSON objects in the file to a dictionary, all of which are appended to a list
-    and then converted to a pandas dataframe.
+    The file is streamed line by line and parsed in chunks of chunksize JSON objects. Each chunk is turned
+    into a dataframe straight away, keeping only the requested columns, and the chunks are concatenated at
+    the end. This way the full list of dictionaries never exists in memory at once.
+
+    If a cache is given, a snapshot from an earlier parse of the same, unchanged file is returned instead, and a
+    fresh parse is stored for next time.
+
+    With more than one worker, an uncompressed file is split into byte ranges aligned on line boundaries and every
+    range is parsed in its own process. The typed results are stacked in file order, so the dataframe is the same
+    as the one a single process would give.
 
     Parameters
     ----------
     name: str
-        Filename
+        Filename. The file may be compressed with gzip, bzip2 or xz.
 
     testing: Bool, optional
         Default is False. When true, searches for .json text file in parent directory.
 
+    columns: tuple, optional
+        Default is None, which keeps all fields. Pass MODEL_COLUMNS to keep only what the Model needs.
+
+    chunksize: int, optional
+        Number of JSON objects parsed per chunk
+
+    decoder: str, optional
+        Name of the JSON decoder backend. Default is None, which uses the fastest one installed.
+
+    schema: dict, optional
+        Default is None, which keeps the dtypes pandas infers. Pass SCHEMA to store the Model's columns compactly.
+
+    cache: cache.DatasetCache, optional
+        Default is None, which always parses the file
+
+    workers: int, optional
+        Number of processes parsing the file. Default is None, which parses it in this process.
+
     Returns
     -------
     df: pd.DataFrame
         A Pandas dataframe containing all the JSON objects from the file.
 
     """
-    # Create empty list
-    doc_list = []
     print("Loading data..")
 
     # If this module is opened in test dir, then move up one dir to find dataset
@@ -45,52 +331,103 @@ def get_data(name: str, testing=False) -> pd.DataFrame:
     else:
         file = name
 
-    # Open JSON file using context manager
-    with open(file) as f:
-        # File contains multiple JSON objects. Loop over all of them.
-        for js in f:
-            # Convert JSON to dic and append to list
-            doc_dic = json.loads(js)
-            doc_list.append(doc_dic)
-    # Convert list to dataframe
-    df = pd.DataFrame(doc_list)
+    if cache is not None:
+        # Parsing options change the result, so they are part of the key
+        key = fingerprint(file, (columns, schema))
+        df = cache.load(key)
+        if df is not None:
+            print("Loaded cached snapshot")
+            return df
+
+    # Compressed streams cannot be split without decompressing them first, so they are always parsed serially
+    if workers is not None and workers > 1 and _compression(file) is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_parse_range, file, start, end, columns, chunksize, decoder, schema)
+                       for start, end in split_ranges(file, workers)]
+            df = concat_chunks([future.result() for future in futures], columns, schema)
+    else:
+        # Open JSON file using context manager, decompressing it if needed
+        # Binary mode, since every decoder backend accepts bytes and most are faster with them
+        with open_input(file) as f:
+            # File contains multiple JSON objects. Parse them a chunk at a time and stack the chunks.
+            df = concat_chunks(read_chunks(f, columns, chunksize, decoder, schema), columns, schema)
+
+    if cache is not None:
+        cache.store(key, df)
     return df
 
 
 @timer
-def get_data_from_url(url: str) -> pd.DataFrame:
+def get_data_from_url(url: str, columns=None, chunksize=CHUNK_SIZE, decoder=None, schema=None,
+                      block_size=BLOCK_SIZE, threads=None, cache=None, http_cache=None) -> pd.DataFrame:
     """
     Convert JSON webpage to a Pandas Dataframe
 
     This function takes a url, assuming it has a sequence of JSON objects and nothing
-    else, like the test datasets posted for the coursework. It first converts them to
-    a text file, then creates JSON objects out of them. Then objects are then converted
-    into a Dataframe.
+    else, like the test datasets posted for the coursework. The response is read in blocks
+    of block_size bytes, split into lines across block boundaries and the lines are fed
+    straight into the chunked parser, so the whole body is never held in memory.
+
+    With more than one thread, and a server that supports range requests, the body is
+    downloaded as parallel segments instead, see download.ranged_lines.
+
+    With an http_cache the body is also written to disk while it is parsed, by one or more
+    threads, and revalidated with a conditional GET on later loads. An unchanged url is then
+    parsed like a local file, so with a cache as well it goes straight to its parsed snapshot.
 
     Parameters
     ----------
     url:str
         String URL for where the JSON objects are supposed to be extracted from
 
+    columns: tuple, optional
+        Default is None, which keeps all fields. Pass MODEL_COLUMNS to keep only what the Model needs.
+
+    chunksize: int, optional
+        Number of JSON objects parsed per chunk
+
+    decoder: str, optional
+        Name of the JSON decoder backend. Default is None, which uses the fastest one installed.
+
+    schema: dict, optional
+        Default is None, which keeps the dtypes pandas infers. Pass SCHEMA to store the Model's columns compactly.
+
+    block_size: int, optional
+        Number of bytes read from the response at a time
+
+    threads: int, optional
+        Number of parallel connections. Default is None, which uses a single one.
+
+    cache: cache.DatasetCache, optional
+        Cache of parsed snapshots, only used together with http_cache
+
+    http_cache: cache.HttpCache, optional
+        Default is None, which downloads the url every time
+
     Returns
     -------
     df: pd.DataFrame
         Pandas Dataframe containing all the JSON objects found on the webpage
     """
     print("Began reading webpage")
+    if http_cache is not None:
+        local_copy, lines = http_cache.open(url, threads, block_size)
+        if lines is None:
+            return get_data(local_copy, columns=columns, chunksize=chunksize, decoder=decoder, schema=schema,
+                            cache=cache)
+        # Parse while downloading, the lines are written to the local copy as they go by
+        df = concat_chunks(read_chunks(lines, columns, chunksize, decoder, schema), columns, schema)
+        if cache is not None:
+            # Same key as get_data uses, so the next load of the unchanged url reads this snapshot
+            cache.store(fingerprint(local_copy, (columns, schema)), df)
+        return df
+
+    if threads is not None and threads > 1:
+        lines = ranged_lines(url, threads, block_size=block_size)
+        return concat_chunks(read_chunks(lines, columns, chunksize, decoder, schema), columns, schema)
+
     with request.urlopen(url) as response:
-        # Read Webpage
-        content = response.read()
-        # Convert to string
-        text = content.decode()
-        # Split into distinct JSON objects based on newline
-        json_objects = text.strip().split('\n')
-        doc_list = []
-        for obj in json_objects:
-            # Convert string of JSON to dictionary
-            js = json.loads(obj)
-            # Append dictionary to list
-            doc_list.append(js)
-    # Convert list to dataframe
-    df = pd.DataFrame(doc_list)
+        # Read webpage block by block and parse in chunks, same as local files
+        lines = iter_lines(response, block_size)
+        df = concat_chunks(read_chunks(lines, columns, chunksize, decoder, schema), columns, schema)
     return df
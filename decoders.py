@@ -0,0 +1,87 @@
+import io
+import json
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+"""
+Module for JSON decoder backends used when loading Issuu data.
+
+Every backend takes a list of raw JSON lines (bytes or str) and the columns to keep, and returns a dataframe
+for that chunk. The stdlib backend is always available, faster ones are registered only when their library
+is installed. Run benchmark.py to compare them on a real file.
+
+Notes
+------
+PREFERENCE is ordered from fastest to slowest according to benchmark.py, so get_decoder() without a name
+picks the fastest backend that is installed.
+"""
+
+
+def _as_bytes(line) -> bytes:
+    """Lines read from a file opened in binary mode are already bytes, lines from a url may be str"""
+    return line.encode() if isinstance(line, str) else line
+
+
+def stdlib_decode(lines: list, columns=None) -> pd.DataFrame:
+    """Decode each line with json.loads"""
+    return pd.DataFrame([json.loads(line) for line in lines], columns=columns)
+
+
+def orjson_decode(lines: list, columns=None) -> pd.DataFrame:
+    """Decode each line with orjson.loads"""
+    return pd.DataFrame([orjson.loads(line) for line in lines], columns=columns)
+
+
+def bulk_decode(lines: list, columns=None) -> pd.DataFrame:
+    """Join the lines into one JSON array and decode the whole chunk with a single orjson call"""
+    array = b'[' + b','.join(_as_bytes(line) for line in lines) + b']'
+    return pd.DataFrame(orjson.loads(array), columns=columns)
+
+
+def pandas_decode(lines: list, columns=None) -> pd.DataFrame:
+    """Decode the chunk with pandas' own line-delimited JSON reader"""
+    buffer = io.BytesIO(b'\n'.join(_as_bytes(line).rstrip() for line in lines))
+    df = pd.read_json(buffer, lines=True, dtype=False, convert_dates=False)
+    if columns is not None:
+        df = df.reindex(columns=list(columns))
+    return df
+
+
+# All installed backends by name
+DECODERS = {'stdlib': stdlib_decode, 'pandas': pandas_decode}
+if orjson is not None:
+    DECODERS['orjson'] = orjson_decode
+    DECODERS['bulk'] = bulk_decode
+
+# Fastest first
+PREFERENCE = ('orjson', 'bulk', 'stdlib', 'pandas')
+
+
+def get_decoder(name=None):
+    """
+    Get a decoder backend
+
+    Parameters
+    ----------
+    name: str, optional
+        Name of the backend. Default is None, which returns the fastest installed backend.
+
+    Raises
+    ------
+    ValueError
+        If the named backend does not exist or its library is not installed
+
+    Returns
+    -------
+    func
+        Function taking (lines, columns) and returning a dataframe
+    """
+    if name is None:
+        name = next(backend for backend in PREFERENCE if backend in DECODERS)
+    if name not in DECODERS:
+        raise ValueError(f"Decoder '{name}' is not available. Choose from: {', '.join(DECODERS)}")
+    return DECODERS[name]
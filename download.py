@@ -0,0 +1,151 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request
+from urllib.error import HTTPError
+
+"""
+Module for streaming JSON lines from a url.
+
+Lines are produced incrementally so the parser can start on the first ones while the rest of the body is still
+arriving. When the server supports HTTP range requests the body is fetched as several segments in parallel, which
+is much faster over high latency connections than one sequential stream.
+
+"""
+
+# Number of bytes read from a url response at a time
+BLOCK_SIZE = 1024 ** 2
+
+# Size of each ranged segment
+SEGMENT_SIZE = 8 * 1024 ** 2
+
+# Segments requested ahead of the one being parsed, per download thread. Bounds the memory held by segments.
+SEGMENTS_AHEAD = 2
+
+
+def iter_lines(stream, block_size=BLOCK_SIZE):
+    """
+    Yield the lines of a binary stream, reading it block_size bytes at a time
+
+    A line cut in two by a block boundary is carried over and completed by the next block.
+
+    Parameters
+    ----------
+    stream: file object
+        Anything with a read(size) method returning bytes, e.g. an HTTP response
+
+    block_size: int, optional
+        Number of bytes read at a time
+
+    Yields
+    ------
+    line: bytes
+        Next line, without its newline
+    """
+    return _join_lines(iter(lambda: stream.read(block_size), b''))
+
+
+def _join_lines(blocks):
+    """Split consecutive blocks of bytes into lines, carrying partial lines over to the next block"""
+    remainder = b''
+    for block in blocks:
+        lines = (remainder + block).split(b'\n')
+        # The last piece has no newline yet, unless the block happened to end exactly on one
+        remainder = lines.pop()
+        yield from lines
+    if remainder:
+        yield remainder
+
+
+def probe(url: str) -> tuple:
+    """
+    Ask the server how large the body is and whether it accepts range requests
+
+    Returns
+    -------
+    tuple
+        Content length (None if unknown) and True if byte ranges are supported
+    """
+    try:
+        with request.urlopen(request.Request(url, method='HEAD')) as response:
+            length = response.headers.get('Content-Length')
+            accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+    except HTTPError:
+        # Some servers refuse HEAD, in which case fall back to a plain download
+        return None, False
+    return (int(length) if length is not None else None), accepts_ranges
+
+
+def fetch_segment(url: str, start: int, end: int) -> bytes:
+    """
+    Download bytes [start, end) of url
+
+    Raises
+    ------
+    ValueError
+        If the server answers with the whole body instead of the range
+    """
+    with request.urlopen(request.Request(url, headers={'Range': f'bytes={start}-{end - 1}'})) as response:
+        if response.status != 206:
+            raise ValueError("Server ignored the range request")
+        return response.read()
+
+
+def ranged_lines(url: str, threads=4, segment_size=None, block_size=BLOCK_SIZE):
+    """
+    Yield the lines of url, downloading it in parallel ranged segments
+
+    Segments are fetched on a thread pool a few at a time and handed to _join_lines in order, which realigns them
+    to line boundaries. The first lines are therefore yielded as soon as the first segment arrives, while later
+    ones are still downloading. If the server does not advertise byte ranges, or the body fits in one segment,
+    the url is streamed over a single connection instead.
+
+    Parameters
+    ----------
+    url: str
+        Url of a JSON lines file
+
+    threads: int, optional
+        Number of parallel connections
+
+    segment_size: int, optional
+        Bytes per ranged request. Default is None, which uses SEGMENT_SIZE.
+
+    block_size: int, optional
+        Bytes per read when falling back to a single stream
+
+    Yields
+    ------
+    line: bytes
+        Next line, without its newline
+    """
+    segment_size = segment_size or SEGMENT_SIZE
+    length, accepts_ranges = probe(url)
+    if not accepts_ranges or length is None or length <= segment_size:
+        with request.urlopen(url) as response:
+            yield from iter_lines(response, block_size)
+        return
+
+    starts = iter(range(0, length, segment_size))
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque()
+
+        def request_next():
+            start = next(starts, None)
+            if start is not None:
+                pending.append(executor.submit(fetch_segment, url, start, min(start + segment_size, length)))
+
+        for _ in range(threads * SEGMENTS_AHEAD):
+            request_next()
+
+        def segments():
+            while pending:
+                segment = pending.popleft().result()
+                request_next()
+                yield segment
+
+        try:
+            yield from _join_lines(segments())
+        finally:
+            # Stop downloading if the consumer gave up early, e.g. on a parse error
+            for future in pending:
+                future.cancel()
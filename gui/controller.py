@@ -1,4 +1,4 @@
-import tkinter
+from gui.worker import Worker
 
 
 class Controller:
@@ -25,11 +25,39 @@ class Controller:
 
     view_top_readers
         View top 10 readers
+
+    view_top_documents(doc_id: str, user_id: str)
+        View top documents also read by readers of doc_id
+
+    select_data(filename: str)
+        Load another dataset
+
+    view_also_likes(doc_id: str, user_id: str)
+        View graph of also like documents
+
+    Notes
+    -----
+    Model methods run on a background Worker and the View is updated from Tk callbacks once they are done, so the
+    window never freezes during a computation.
     """
 
     def __init__(self, model, view):
         self.model = model
         self.view = view
+        # Model computations run on a background thread, so the window stays responsive. See worker.py.
+        self.worker = Worker(view, on_idle=self._idle)
+        # New datasets are loaded on a thread of their own, while the current one keeps answering queries
+        self.loader = Worker(view, on_idle=self._idle)
+
+    def _idle(self):
+        """Remove the View's progress message once neither thread has anything left to do"""
+        if self.worker.pending == 0 and self.loader.pending == 0:
+            self.view.show_idle()
+
+    def _submit(self, message, compute, on_done=None):
+        """Run compute on the worker thread, showing message until it is done and any KeyError/ValueError after"""
+        self.view.show_busy(message)
+        self.worker.submit(compute, on_done, on_error=self.view.show_error)
 
     def view_country(self, document_id):
         """
@@ -41,18 +69,19 @@ class Controller:
             unique identification for file on Issuu
 
         """
-        try:
-            # Set the model's current document ID
+        def compute():
+            # Set the model's current document ID, which raises if it is not valid, then count its countries. The ID
+            # is returned with the counts, so the plot does not read the Model while the worker may change it.
             self.model.document_id = document_id
-            # Show a success message indicating document was found
+            return self.model.country_counts(), document_id
+
+        def show(result):
+            # Show a success message indicating document was found, then plot on the Tk thread
             self.view.show_success("Document found!")
-            # Invoke the model's method which shows country and continent for its current document_id
-            self.model.view_country()
+            self.model.plot_country(*result)
 
-        except (KeyError, ValueError) as error:
-            # If no document found or invalid ID given as input, invoke the View class's method to display
-            # this error on the GUI window
-            self.view.show_error(error)
+        # If no document found or invalid ID given as input, the View displays the error on the GUI window
+        self._submit("Counting countries...", compute, show)
 
     def view_continent(self, document_id):
         """
@@ -64,47 +93,45 @@ class Controller:
             unique identification for file on Issuu
 
         """
-        try:
-            # Set the model's current document ID
+        def compute():
             self.model.document_id = document_id
-            # Show a success message indicating document was found
+            return self.model.continent_counts(), document_id
+
+        def show(result):
             self.view.show_success("Document found!")
-            # Invoke the model's method which shows country and continent for its current document_id
-            self.model.view_continent()
+            self.model.plot_continent(*result)
 
-        except (KeyError, ValueError) as error:
-            # If no document found or invalid ID given as input, invoke the View class's method to display
-            # this error on the GUI window
-            self.view.show_error(error)
+        self._submit("Counting continents...", compute, show)
 
     def view_long_browsers(self):
         """Invoke Model's method to display long name browser histogram"""
-        self.model.view_long_browsers()
+        self._submit("Counting browsers...", self.model.long_browser_counts, self.model.plot_long_browsers)
 
     def view_short_browsers(self):
         """Invoke Model's method to display short name browser histogram"""
-        self.model.view_short_browsers()
+        self._submit("Counting browsers...", self.model.short_browser_counts, self.model.plot_short_browsers)
 
     def view_top_readers(self):
         """Invoke Model's method to display top 10 readers and View them as well"""
-        # Model returns dataframe of top readers
-        top_readers = self.model.view_top_readers()
-        # Convert above dataframe to a list
-        top_readers_list = top_readers.values.tolist()
-        # Use View method to display top readers in GUI
-        self.view.view_listbox(top_readers_list)
+        # Model returns dataframe of top readers, which is converted to a list for the View to display
+        self._submit("Ranking readers...", lambda: self.model.view_top_readers().values.tolist(),
+                     self.view.view_listbox)
 
     def view_top_documents(self, doc_id, user_id):
         """View Top documents by read time"""
-        # Get list of top docs from model
-        top_dict = self.model.view_top_documents(doc_id, user_id)
-        # Pass it to View to display it
-        self.view.view_top_documents_listbox(top_dict)
+        # Get list of top docs from model, then pass it to View to display it
+        self._submit("Ranking documents...", lambda: self.model.view_top_documents(doc_id, user_id),
+                     self.view.view_top_documents_listbox)
 
     def select_data(self, filename):
         """
         Change Dataset
 
+        The new dataset and its indexes are loaded by the loader thread, while queries keep running on the current
+        one. It is then swapped in by the worker thread, between two queries, and the old one is released. If the
+        load fails the current dataset is kept. With --single-buffer the current dataset is released first instead,
+        and queries wait for the load.
+
         Warnings
         ---------
         DOES NOT work on macOS. There is some compatibility issue on tkinter's side. Not tested on Windows.
@@ -113,14 +140,26 @@ class Controller:
         -----
         Works fine on Linux
         """
-        try:
-            # Pass new filename to model, which loads data from it
-            self.model.select_data(filename)
+        def show(_):
             self.view.show_success("Changed dataset successfully")
             self.view.user_id.set('')
-        except tkinter.TclError as e:
-            self.view.show_error(e)
+
+        errors = (OSError, KeyError, ValueError)
+        self.view.show_busy("Loading dataset...")
+        if self.model.args.get('single_buffer'):
+            # Pass new filename to model, which loads data from it
+            self.worker.submit(lambda: self.model.select_data(filename), show, self.view.show_error, errors)
+        else:
+            self.loader.submit(lambda: self.model.load_data(filename),
+                               lambda dataset: self.worker.submit(lambda: self.model.swap_data(dataset), show),
+                               self.view.show_error, errors)
 
     def view_also_likes(self, doc_id, user_id=None):
         """View graph of also like documents"""
-        self.model.view_also_likes(doc_id, user_id)
+        # Building the graph and starting the viewer do not touch the window, so both run on the worker thread
+        self._submit("Building graph...", lambda: self.model.view_also_likes(doc_id, user_id))
+
+    def close(self):
+        """Stop the worker and loader threads when the window is closed"""
+        self.worker.shutdown()
+        self.loader.shutdown()
@@ -1,13 +1,28 @@
+import os
 import matplotlib.pyplot as plt
 import pandas as pd
 from data import get_data
 from data import get_data_from_url
+from data import MODEL_COLUMNS
+from data import SCHEMA
+from cache import DatasetCache, HttpCache, CACHE_DIR, MAX_CACHE_BYTES, fingerprint
+import mapped
+from cooccurrence import Cooccurrence
+from readindex import ReadIndex, abbreviate, gather
+import histograms
+from useragent import UserAgentClassifier
 from convert import Convert
 import numpy as np
-from matplotlib.ticker import PercentFormatter
+import charts
 from timer import timer
-from graphviz import Digraph
-from sorters import desc
+import graphviz
+from also_likes import AlsoLikesGraph
+from sorters import get_sorter
+from memo import ResultCache, cached, MAX_ENTRIES, MAX_BYTES
+from collections import namedtuple
+
+# A dataset loaded by Model.load_data with everything derived from it, ready to be swapped in by Model.swap_data
+Dataset = namedtuple('Dataset', ['df', 'key', 'filename', 'indexes'])
 
 
 class Model:
@@ -27,6 +42,21 @@ class Model:
 
     Methods
     -------
+    select_data(filename: str)
+        Loads another dataset
+
+    load_data(filename: str)
+        Returns another dataset with its indexes, without changing the current one
+
+    swap_data(dataset: Dataset)
+        Replaces the current dataset by one returned by load_data
+
+    country_counts(doc_uuid: str)
+        Returns the number of viewers per country of a document
+
+    continent_counts(doc_uuid: str)
+        Returns the number of viewers per continent of a document
+
     view_country(doc_uuid: str)
         Plots countries of viewers for a given document_id
 
@@ -39,8 +69,11 @@ class Model:
     view_short_browsers
         Plots short name browser histogram for entire dataset
 
-    view_top_readers
-        Displays top 10 readers for the entire dataset
+    top_readers(n: int)
+        Returns the top n readers for the entire dataset
+
+    view_top_readers(n: int)
+        Displays top n readers for the entire dataset
 
     readers_of_document(doc_uuid: str)
         Returns all readers of a document
@@ -49,10 +82,16 @@ class Model:
         Returns all documents_uuids read by a user
 
     counter(readers:list, doc_id:str, user_id:str)
-        Function meant to use as a higher order counter
+        Function meant to use as a higher order counter, counting the documents of several readers
+
+    top_documents(doc_uuid: str, user_uuid: str, sort: str, k: int)
+        Returns the top k also like documents
+
+    view_top_documents(doc_uuid: str, user_uuid: str, sort: str, k: int)
+        Displays and returns the top k also like documents
 
-    view_top_documents(doc_uuid: str, user_uuid: str, sort: func)
-        Returns the top 10 also like documents
+    write_also_likes(doc_uuid: str, user_uuid: str, path: str)
+        Writes the graph of all also like documents to a DOT file
 
     view_also_likes(doc_uuid: str, user_uuid: str)
         Graphs all also like documents
@@ -63,16 +102,107 @@ class Model:
         # Make document_id private so values can be validated before setting
         self._document_id = document_id
         self.args = args
+        self._reset_indexes()
+        # One converter for the lifetime of the Model, rather than one per continent histogram
+        self.converter = Convert()
+        # Kept across select_data, so its cache of parsed user agents serves every dataset
+        self.useragents = UserAgentClassifier()
+        # Answers to recent queries, keyed by dataset, query and arguments. See memo.py.
+        max_entries = args['result_cache_entries'] if args.get('result_cache_entries') is not None else MAX_ENTRIES
+        max_bytes = args['result_cache_size'] * 1024 ** 2 if args.get('result_cache_size') is not None else MAX_BYTES
+        self.results = ResultCache(max_entries, max_bytes)
+        self.dataset_key = None
+        # Snapshots of parsed files, so unchanged files are not parsed again. Disabled with --no-cache.
+        # Local copies of url datasets are revalidated with the server instead of downloaded again.
+        if args.get('no_cache'):
+            self.cache = None
+            self.http_cache = None
+        else:
+            cache_dir = args.get('cache_dir') or CACHE_DIR
+            max_bytes = args['cache_size'] * 1024 ** 2 if args.get('cache_size') else MAX_CACHE_BYTES
+            # Snapshots and url bodies share the size limit, half each
+            self.cache = DatasetCache(cache_dir, max_bytes // 2, rebuild=args.get('rebuild_cache'))
+            self.http_cache = HttpCache(os.path.join(cache_dir, 'http'), max_bytes - max_bytes // 2)
         # In the command line, if url was mentioned use it to retrieve JSON data
         if args['url'] is not None:
-            self.df = get_data_from_url(args['url'])
+            self.df = get_data_from_url(args['url'], columns=MODEL_COLUMNS, decoder=args.get('decoder'),
+                                        schema=SCHEMA, threads=args.get('download_threads'), cache=self.cache,
+                                        http_cache=self.http_cache)
+            self.dataset_key = self._url_key(args['url'])
+            self.current_filename = args['url']
         # If no url was mentioned, use the file name passed in CLI
         else:
             self.current_filename = args['file_name']
-            self.df = get_data(self.current_filename)
+            self.df, self.dataset_key = self._load(self.current_filename)
+
+    def _url_key(self, url):
+        """Key of a url dataset for the result cache, from the content of its local copy like a file's"""
+        if self.http_cache is not None and os.path.exists(self.http_cache.path(url)):
+            return fingerprint(self.http_cache.path(url), MODEL_COLUMNS)
+        # Without a local copy the content is unknown, so the results of this load are never shared with another one
+        return ('url', url, object())
+
+    def _load(self, filename) -> tuple:
+        """Load a JSON file, or map a folder written by mapped.convert, and fingerprint it for the result cache"""
+        if mapped.is_mapped(filename):
+            return mapped.load(filename), fingerprint(os.path.join(filename, mapped.MANIFEST))
+        key = fingerprint(filename, MODEL_COLUMNS)
+        return get_data(filename, columns=MODEL_COLUMNS, decoder=self.args.get('decoder'), schema=SCHEMA,
+                        cache=self.cache, workers=self.args.get('workers')), key
+
+    def load_data(self, filename) -> Dataset:
+        """
+        Load a dataset and build its indexes, without changing the current dataset
+
+        Only reads the options and caches of the Model, so it can run on another thread while the current dataset
+        keeps answering queries.
+
+        Parameters
+        ----------
+        filename: str
+            JSON file, or folder written by mapped.convert
+
+        Returns
+        -------
+        Dataset
+            New dataset, to be passed to swap_data
+        """
+        df, key = self._load(filename)
+        return Dataset(df, key, filename, self._indexes(df))
+
+    def swap_data(self, dataset: Dataset):
+        """
+        Replace the current dataset by one returned by load_data, releasing the old one
+
+        Queries must not run concurrently with this method, e.g. run it on the same thread as them.
+        """
+        self.df, self.dataset_key, self.current_filename = dataset.df, dataset.key, dataset.filename
+        self._index, self._cooccurrence, self._country_counts = dataset.indexes
+        self._document_rows = None
+        # Results of the previous dataset can no longer be asked for, so free their memory
+        self.results.clear()
+
+    def release_data(self):
+        """Replace the current dataset by an empty one, in which no document or reader is found"""
+        self.df = pd.DataFrame(columns=list(MODEL_COLUMNS)).astype(SCHEMA)
+        self.dataset_key, self.current_filename = None, None
+        self._reset_indexes()
+        self.results.clear()
 
     def select_data(self, filename):
-        self.df = get_data(filename)
+        """
+        Load another dataset
+
+        By default the new dataset is loaded next to the current one, which is only replaced once the new one and
+        its indexes are built, so a failed load leaves the Model unchanged. With --single-buffer the current dataset
+        is released first, so the two are never in memory together, and a failed load leaves an empty dataset.
+        A path that does not exist raises OSError before anything is released.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"No such file or folder: {filename}")
+        if self.args.get('single_buffer'):
+            self.release_data()
+        self.swap_data(self.load_data(filename))
 
     @property
     def document_id(self):
@@ -91,19 +221,65 @@ class Model:
 
         """
 
-        # Get files in the retrieved dataset that correspond to the given document_id
-        series = self.df[self.df.subject_doc_id == value]
-
         # If no document_id is given, raise error
         if value is None:
             raise ValueError("No document ID entered.")
-        # If no files found with given document_id, raise error
-        elif len(series) == 0:
+        # If no files found with given document_id, raise error. A lookup in the document index, not a scan.
+        elif len(self.index.rows(self.index.document_code(value))) == 0:
             raise KeyError("No document found with that UUID found.")
         # Otherwise change the Model class's current document_id to supplied value
         else:
             self._document_id = value
 
+    def document_rows(self, doc_uuid: str = None) -> pd.DataFrame:
+        """
+        Rows of the dataset about a document
+
+        The rows are taken by position from the document index, and the last document's rows are kept, so that
+        viewing its countries and then its continents only slices the dataset once.
+
+        Parameters
+        ----------
+        doc_uuid: str, optional
+            Document ID. Default is None, which uses the current document_id.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Same rows as self.df[self.df.subject_doc_id == doc_uuid]
+        """
+        doc_uuid = self.document_id if doc_uuid is None else doc_uuid
+        if self._document_rows is None or self._document_rows[0] != doc_uuid:
+            positions = self.index.rows(self.index.document_code(doc_uuid))
+            self._document_rows = (doc_uuid, self.df.iloc[positions])
+        return self._document_rows[1]
+
+    def country_counts(self, doc_uuid: str = None) -> pd.Series:
+        """
+        Number of rows per viewer country for a document
+
+        A lookup in the precomputed count table with --precompute-histograms, otherwise counted from the rows of the
+        document.
+
+        Parameters
+        ----------
+        doc_uuid: str, optional
+            Document ID. Default is None, which uses the current document_id.
+
+        Returns
+        -------
+        pandas.Series
+            Counts indexed by country code, in order of first appearance
+        """
+        doc_uuid = self.document_id if doc_uuid is None else doc_uuid
+        if self._country_counts is not None:
+            return self._country_counts.countries(self.index.document_code(doc_uuid))
+        return histograms.country_counts(self.document_rows(doc_uuid).visitor_country)
+
+    def continent_counts(self, doc_uuid: str = None) -> pd.Series:
+        """Number of rows per viewer continent for a document, summed from its country counts"""
+        return histograms.continent_counts(self.country_counts(doc_uuid), self.converter)
+
     def view_country(self, viewing=True):
         """
         View country of viewers for the class's current document_id
@@ -111,32 +287,37 @@ class Model:
         Parameters
         ----------
         viewing: Bool, optional
-            Default is True. This method returns a dataframe where only records corresponding to the Model class's
-            document_id are present. That new df is used by view_continents method so that it does not have to filter
-            data again, but if we use this method directly it will display the country histogram too. The bool value
-            prevents unwanted graph.
-
+            Default is True. This method returns the number of viewers per country of the Model class's document_id,
+            and if we use this method directly it will display the country histogram too. The bool value prevents
+            unwanted graph.
+
+        Returns
+        -------
+        pandas.Series
+            Counts indexed by country code
         """
         # If running the app without the GUI set the document id manually (otherwise View does it via Controller)
         if self.args['task'] != '7':
             self.document_id = self.args['document_uuid']
 
-        # Filter the dataset dataframe to only get rows which correspond to the given document_id
-        # i.e. get countries of viewers for this file
-        doc_with_id = self.df[self.df.subject_doc_id == self.document_id]
+        # Get countries of viewers for this file, counted rather than listed row by row
+        countries = self.country_counts()
 
         if viewing:
-            # Prepare two figures side by side
-            fig, ax1 = plt.subplots(1, 1, figsize=(6, 6))
-            fig.suptitle(f'Histogram of Countries for file:\n{self._document_id}')
+            self.plot_country(countries, self._document_id)
 
-            # Plot countries
-            ax1.hist(doc_with_id.visitor_country)
-            ax1.set_title('Countries')
-            ax1.set(ylabel='Count')
-            plt.show()
+        return countries
 
-        return doc_with_id
+    def plot_country(self, countries: pd.Series, document: str):
+        """
+        Plot the country counts of a document. Must run on the main thread, like every plot.
+
+        The document ID is passed along with the counts rather than read from document_id, which the worker thread
+        may be changing for the next request.
+        """
+        fig, ax = plt.subplots(1, 1, figsize=charts.FIGSIZE['countries'])
+        charts.countries(fig, ax, countries, document, charts.chart_top(self.args))
+        plt.show()
 
     def view_continent(self):
         """View continent of viewers for the class's current document_id"""
@@ -145,25 +326,19 @@ class Model:
         if self.args['task'] != '7':
             self.document_id = self.args['document_uuid']
 
-        # Prepare two figures side by side
-        fig, ax2 = plt.subplots(1, 1, figsize=(6, 6))
-        fig.suptitle(f'Histogram of Continents for file:\n{self._document_id}')
-
-        # Use data from view countries function to get the country dataframe
-        doc_with_countries = self.view_country(viewing=False)
-
-        # Instantiate a converter
-        converter = Convert()
-        # Convert viewer countries into continent names and save new dataframe
-        docs_with_continent_codes = converter.map_to_continent_code(doc_with_countries)
-
-        # Plot new dataframe with continent names
-        ax2.hist(docs_with_continent_codes.visitor_country)
-        ax2.set_title('Continents')
-        ax2.set(ylabel='Count')
+        # Sum the country counts of this document per continent, instead of converting every row
+        self.plot_continent(self.continent_counts(), self._document_id)
 
+    def plot_continent(self, continents: pd.Series, document: str):
+        """Plot the continent counts of a document, see plot_country"""
+        fig, ax = plt.subplots(1, 1, figsize=charts.FIGSIZE['continents'])
+        charts.continents(fig, ax, continents, document, charts.chart_top(self.args))
         plt.show()
 
+    def long_browser_counts(self) -> pd.Series:
+        """Number of rows per full visitor_useragent string, in order of first appearance"""
+        return histograms.value_counts(self.df['visitor_useragent'])
+
     def view_long_browsers(self):
         """
         Display Histogram of each browser used in the dataset
@@ -171,17 +346,18 @@ class Model:
         Displays histogram of long browser names, i.e. the full visitor_useragent string
         """
         print("Creating Histogram...")
-        # Prepare figure and axis
-        fig, ax1 = plt.subplots(1, 1, figsize=(10, 6))
-        fig.suptitle('Histogram of Long Browser Names')
-
-        # Plot long names
-        long_name_list = list(self.df.visitor_useragent)
-        # ax1.hist(long_name_list, orientation='horizontal')
-        ax1.hist(long_name_list)
-        ax1.set_title('User Agent')
+        self.plot_long_browsers(self.long_browser_counts())
+
+    def plot_long_browsers(self, browsers: pd.Series):
+        """Plot the long browser name counts"""
+        fig, ax = plt.subplots(1, 1, figsize=charts.FIGSIZE['long_browsers'])
+        charts.long_browsers(fig, ax, browsers, charts.chart_top(self.args))
         plt.show()
 
+    def short_browser_counts(self) -> pd.Series:
+        """Number of rows per short browser name. Only the distinct useragent strings are parsed, see useragent.py."""
+        return self.useragents.counts(self.df['visitor_useragent'])
+
     def view_short_browsers(self):
         """
         Display Histogram of each browser used in the dataset
@@ -191,146 +367,201 @@ class Model:
 
         """
         print("Creating Histogram...")
-        # Get the useragent string, split it at '/' since all browser names have that followed by their versions.
-        # Once we have the split string, browser name is always the first element so we access it using the 0 index.
-        self.df['browser'] = self.df.apply(lambda row: row['visitor_useragent'].split('/')[0], axis=1)
-
-        # Prepare figure and axis
-        fig, ax1 = plt.subplots(1, 1, figsize=(8, 6))
-        fig.suptitle('Histogram of Short Browser Names')
-
-        # Divide each category by total observations to get percentage
-        ax1.hist(self.df.browser, weights=np.ones(len(self.df.browser)) / len(self.df.browser))
-        ax1.set(ylabel='Percentage')
-        plt.gca().yaxis.set_major_formatter(PercentFormatter(1))
+        self.plot_short_browsers(self.short_browser_counts())
+
+    def plot_short_browsers(self, browsers: pd.Series):
+        """Plot the short browser name counts as percentages"""
+        fig, ax = plt.subplots(1, 1, figsize=charts.FIGSIZE['short_browsers'])
+        charts.short_browsers(fig, ax, browsers, charts.chart_top(self.args))
         plt.show()
 
+    @cached
+    def top_readers(self, n: int) -> pd.DataFrame:
+        """Top n readers of the dataset according to their page read time, see view_top_readers"""
+        if n < 1:
+            raise ValueError("Number of top readers must be at least 1.")
+        # Total page read time of every visitor in one vectorized pass. Visitors without read time events sum to 0.
+        read_time = self.df.groupby('visitor_uuid', observed=True)['event_readtime'].sum()
+        # Only the top n are needed, so select them in linear time instead of sorting every visitor
+        top_readers = (read_time.astype('float64').nlargest(n) / 1000).reset_index()
+        top_readers.columns = ['visitor_uuid', 'read time (seconds)']
+        return top_readers
+
     @timer
-    def view_top_readers(self):
-        """View Top 10 Readers for the dataset according to their page read time"""
-        data = []
-        # Group dataset by visitor_uuid
-        groups = self.df.groupby('visitor_uuid')
-        for group_key, group_value in groups:
-            # Separate into groups using uuid
-            group = groups.get_group(group_key).reset_index(drop=True)
-            # Sum their page read time column and convert it to seconds
-            total_read_time_seconds = (group.event_readtime.sum()) / 1000
-            # Append uuid and read time to data list above
-            data.append([group.visitor_uuid.iloc[0], total_read_time_seconds])
-
-        # Convert data list into dataframe
-        readers_df = pd.DataFrame(data, columns=['visitor_uuid', 'read_time'])
-        # Sort by read time values in descending order
-        readers_df.sort_values(by=['read_time'], ascending=False, inplace=True)
-        readers_df.rename(columns={'read_time': 'read time (seconds)'}, inplace=True)
-        # Get the top ten readers, print and return them. The returned values are used for GUI if requested
-        top_10_readers = readers_df.iloc[0:10]
-        print(top_10_readers)
-        return top_10_readers
+    def view_top_readers(self, n=None):
+        """
+        View the top readers of the dataset according to their page read time
 
+        Parameters
+        ----------
+        n: int, optional
+            Number of readers to show. Default is None, which uses the --top option, or 10 if it was not given.
+
+        Returns
+        -------
+        pandas.DataFrame
+            visitor_uuid and read time (seconds) of the top readers, longest read time first
+        """
+        if n is None:
+            n = self.args.get('top') or 10
+        top_readers = self.top_readers(n)
+        print(top_readers)
+        return top_readers
+
+    def build_indexes(self):
+        """
+        Factorize readers and documents into integer codes and index who read what
+
+        See readindex.py. Looking up the readers of a document or the documents of a reader is then a slice of an
+        integer array instead of a scan of the dataframe. Built lazily on first use and dropped whenever the
+        dataset changes.
+        """
+        self._index, self._cooccurrence, self._country_counts = self._indexes(self.df)
+
+    def _indexes(self, df) -> tuple:
+        """Index of df, and its co-occurrence counts and country count table if the options ask for them"""
+        index = ReadIndex(df)
+        # Optionally precompute document co-occurrence counts too, for many also likes queries on the same data
+        cooccurrence = Cooccurrence(index) if self.args.get('cooccurrence') else None
+        # Optionally count the countries of every document at once, for many country and continent histograms
+        country_counts = None
+        if self.args.get('precompute_histograms'):
+            country_counts = histograms.CountryCounts(index.document_codes_by_row, df['visitor_country'])
+        return index, cooccurrence, country_counts
+
+    def _reset_indexes(self):
+        """Drop indexes built for the previous dataset"""
+        self._index = None
+        self._cooccurrence = None
+        self._document_rows = None
+        self._country_counts = None
+
+    @property
+    def index(self):
+        """Reader and document codes of the current dataset, built on first use"""
+        if self._index is None:
+            self.build_indexes()
+        return self._index
+
+    def _readers_of(self, doc_uuid: str):
+        """Code of doc_uuid and the codes of its readers"""
+        document = self.index.document_code(doc_uuid)
+        readers = self.index.readers(document) if document >= 0 else []
+        if len(readers) == 0:
+            raise ValueError("No document found")
+        return document, readers
+
+    @cached
     def readers_of_document(self, doc_uuid: str):
         """For a given document_uuid, return all visitor_uuid who read the document"""
-        df = self.df[self.df['subject_doc_id'] == doc_uuid]
-        df = df[df['subject_type'] == 'doc']
-        df = df[df['event_type'] == 'read']
-        if len(df) == 0:
-            raise ValueError("No document found")
-        return list(df['visitor_uuid'].unique())
+        return list(self.index.reader_ids[self._readers_of(doc_uuid)[1]])
 
+    @cached
     def documents_read_by_user(self, user_uuid: str):
         """For a given user_uuid, return all the document_uuids that have been read"""
-        df = self.df[self.df.visitor_uuid == user_uuid]
-        df = df[df['subject_type'] == 'doc']
-        df = df[df['event_type'] == 'read']
-        df = df[df['env_type'] == 'reader']
-        if len(df) == 0:
+        reader = self.index.reader_code(user_uuid)
+        if reader < 0 or not self.index.active[reader]:
             raise ValueError("No user found")
-        # Some doc_ids were NaN weirdly enough, so had to drop those.
-        df = df[df['subject_doc_id'].notna()]
-        # Avoiding sets here because for large series df.unique() is faster
-        unique_df = df['subject_doc_id'].unique()
-        unique_list = list(unique_df)
-        # Abbreviate document IDs to last four characters
-        unique_list_with_abbreviated_names = list(map(lambda x: x[-4:], unique_list))
-        return unique_list_with_abbreviated_names
+        return list(self.index.document_ids[self.index.documents(reader)])
 
     # Higher order function
     def counter(self, readers: list, doc_uuid: str, user_uuid=None) -> dict:
-        # Empty dictionary to contain frequency of documents
-        records = {}
-        for reader in readers:
-            # If current user is the same as input reader, we do not count their 'vote'/'read' for non-input documents.
-            if user_uuid is not None and reader[-4:] == user_uuid[-4:]:
-                continue
-            # All documents read by this user
-            documents_read = self.documents_read_by_user(reader)
-
-            # Check for each document
-            for document in documents_read:
-                # If it is not input document
-                if document != doc_uuid[-4:]:
-                    # And not present in records dictionary
-                    if document not in records:
-                        # Add document to dic with count as 1
-                        records[document] = 1
-                    else:
-                        # If present in dictionary, increment document count
-                        records[document] += 1
-
-        return records
-
-    def view_top_documents(self, doc_uuid: str, user_uuid: str = None, sort=None):
-        """ Shows top documents that were also read by users who read doc_uuid"""
+        """
+        Count how many of the given readers read each document, other than doc_uuid
+
+        Parameters
+        ----------
+        readers: list
+            Readers of doc_uuid, as returned by readers_of_document
+
+        doc_uuid: str
+            Input document ID, which is not counted
+
+        user_uuid: str, optional
+            Input user ID. If they are one of the readers, their reads are not counted.
 
+        Returns
+        -------
+        dict
+            Full document IDs and their number of readers
+        """
+        document = self.index.document_code(doc_uuid)
+        user = self.index.reader_code(user_uuid) if user_uuid is not None else -1
+        # With --cooccurrence the counts of every reader of doc_uuid are one precomputed row
+        if self._cooccurrence is not None:
+            documents, counts = self._cooccurrence.row(document, [user] if user >= 0 else [])
+            return dict(zip(self.index.document_ids[documents].tolist(), counts.tolist()))
+
+        # If current user is the same as input reader, we do not count their 'vote'/'read' for non-input documents.
+        codes = self.index.reader_codes(readers)
+        codes = codes[(codes >= 0) & (codes != user)]
+        # Documents read by every reader, one after the other, without the input document
+        documents = gather(self.index.reads, codes)
+        documents = documents[documents != document]
+        # Count each document, keeping them in the order they were first read
+        positions, distinct = pd.factorize(documents)
+        return dict(zip(self.index.document_ids[distinct].tolist(), np.bincount(positions).tolist()))
+
+    @cached
+    def top_documents(self, doc_uuid: str, user_uuid: str = None, sort=None, k=10) -> dict:
+        """Full IDs of the top k documents also read by readers of doc_uuid, see view_top_documents"""
+        sorter, _ = get_sorter(sort)
         # All readers of input document
         readers = self.readers_of_document(doc_uuid)
+        # Generate records of document as keys and their count as values, once, then keep the top k of them
+        records = self.counter(readers, doc_uuid, user_uuid)
+        return sorter(records, k)
 
-        if sort is None:
-            sort_type = '(alphabetical on keys)'
-            # Generate records of document as keys and their count as values
-            records = self.counter(readers, doc_uuid, user_uuid)
-            # Sort the dictionary using default params, i.e. on keys of the dic and alphabetically
-            sorted_dic = dict(sorted(records.items()))
+    def view_top_documents(self, doc_uuid: str, user_uuid: str = None, sort=None, k=None):
+        """
+        Shows top documents that were also read by users who read doc_uuid
 
-        # Only implementing one higher order sort function, so else automatically means that
-        else:
-            sort_type = '(descending on values)'
-            # Sort the dictionary using values, i.e. counts and in descending order
-            # desc takes in all readers, a function to count them, and ID values
-            sorted_dic = desc(readers, self.counter, doc_uuid, user_uuid)
-
-        # If the sorted dictionary has more then 10 documents, we need to trim it
-        if len(sorted_dic) > 10:
-            # Create new dictionary
-            top_documents_dictionary = {}
-            # This iteration goes from first element to last. E.g for descending sort, it will iterate from
-            # max count to lowest.
-            for document, count in sorted_dic.items():
-                # Get key, value pair. If the new dic does not have more than 10 entries, append the new one
-                if len(top_documents_dictionary) < 10:
-                    top_documents_dictionary[document] = count
-                else:
-                    # Once we have 10 entries break the loop
-                    break
-        else:
-            top_documents_dictionary = sorted_dic
+        Parameters
+        ----------
+        doc_uuid: str
+            Input document ID
+
+        user_uuid: str, optional
+            Input user ID, whose reads are not counted
+
+        sort: str, optional
+            Name of a sorter registered in sorters.py. Default is None, which sorts alphabetically on document IDs.
+
+        k: int, optional
+            Number of documents to show. Default is None, which uses the --top option, or 10 if it was not given.
+
+        Returns
+        -------
+        dict
+            Full IDs of the top documents and their number of readers, in display order
+        """
+        if k is None:
+            k = self.args.get('top') or 10
+        _, description = get_sorter(sort)
+        top_documents_dictionary = self.top_documents(doc_uuid, user_uuid, sort, k)
 
-        print('Top 10 Documents ' + sort_type)
+        print(f'Top {k} Documents ({description})')
         print('document_uuid    number of readers')
-        for key, value in top_documents_dictionary.items():
+        # IDs are only abbreviated for display
+        for key, value in zip(abbreviate(top_documents_dictionary), top_documents_dictionary.values()):
             print(f'{key}                   {value}')
 
         return top_documents_dictionary
 
     @timer
     def view_also_likes(self, doc_id, user_id=None):
+        """Graph all 'also like' documents for given doc_id and user id, and open it in a viewer"""
+        # Render the DOT source to also_likes.gv.pdf, like graphviz.Digraph.view does, and open it
+        graphviz.view(graphviz.render('dot', 'pdf', self.write_also_likes(doc_id, user_id)))
+
+    def write_also_likes(self, doc_id, user_id=None, path='also_likes.gv') -> str:
         """
         Creates graph of all 'also like' documents for given doc_id and user id
 
         For the input document, all readers are identified. Then for those readers,
         all of the documents they've read are identified. These documents are then
-        plotted.
+        plotted. The graph is pruned as asked by the --graph-top, --graph-min-support and --graph-max-readers
+        options, see also_likes.py.
 
         Parameters
         ----------
@@ -340,53 +571,22 @@ class Model:
         user_id: str, optional
             Input user ID
 
+        path: str, optional
+            DOT file written
+
+        Returns
+        -------
+        str
+            Path of the DOT file, to render or view with Graphviz
         """
-        # All readers of input document
-        readers = self.readers_of_document(doc_id)
-
-        # Create empty dictionary to store readers and their documents
-        records = {}
-        # Iterate over each reader of the input document
-        for reader in readers:
-            if user_id is None:
-                # Get docs read by user
-                docs_read = self.documents_read_by_user(reader)
-                # Append it to dictionary
-                records[reader[-4:]] = docs_read
-
-            # If input user is provided, we do not want to add them to this dictionary.
-            # Will add them manually when graphing
-            elif user_id is not None and reader[-4:] != user_id[-4:]:
-                docs_read = self.documents_read_by_user(reader)
-                records[reader[-4:]] = docs_read
-
-        # get filename to add to the arrow
-        num = 'Size: ' + self.current_filename.split('_')[1]
-
-        # create digraph
-        graph = Digraph(filename='also_likes.gv')
-
-        # Show relation between nodes
-        graph.node('Readers', color='white')
-        graph.node('Documents', color='white')
-        graph.edge('Readers', 'Documents', label=num)
-
-        # Add input document as node
-        graph.node(doc_id[-4:], style='filled', fillcolor='#3ab125')
-
-        # If input user is given, create a node for them and add edge to input doc
-        if user_id is not None:
-            graph.node(user_id[-4:], style='filled', fillcolor='#3ab125', shape='box')
-            graph.edge(user_id[-4:], doc_id[-4:])
-
-        # Iterate over reader:docs_read dic we created earlier
-        for key, values in records.items():
-            # values represent a list of documents read by reader(key)
-            # Iterate over each document read by this reader
-            for item in values:
-                graph.node(key, shape='box')
-                graph.node(item, shape='circle')
-                graph.edge(key, item)
-
-        # View Graph
-        graph.view()
+        # Code of the input document, which must have readers
+        document, _ = self._readers_of(doc_id)
+        builder = AlsoLikesGraph(self.index, top=self.args.get('graph_top'),
+                                 min_support=self.args.get('graph_min_support') or 1,
+                                 max_readers=self.args.get('graph_max_readers'))
+
+        # get filename to add to the arrow, e.g. 100k for sample_100k_lines.json
+        name = os.path.basename(os.path.normpath(self.current_filename or ''))
+        num = 'Size: ' + (name.split('_')[1] if '_' in name else name)
+
+        return builder.write(builder.build(document, user_id, num), path)
@@ -3,6 +3,7 @@ from tkinter import ttk
 from gui.controller import Controller
 from tkinter import filedialog
 import os
+from readindex import abbreviate
 
 
 class View(ttk.Frame):
@@ -35,6 +36,12 @@ class View(ttk.Frame):
     hide_message
         Hides any messages being displayed on the GUI
 
+    show_busy(message: str)
+        Displays a progress message while the Controller computes in the background
+
+    show_idle
+        Removes the progress message once every computation is done
+
     view_country_button_clicked
         Signals the controller that country histograms were requested
 
@@ -51,7 +58,7 @@ class View(ttk.Frame):
         Signals the Controller that top readers list is requested
 
     view_listbox(readers_list: list)
-        Displays Top 10 Readers in new GUI window
+        Displays Top Readers in new GUI window
 
     view_top_documents
         Requests a dictionary of top documents from the Controller
@@ -114,12 +121,13 @@ class View(ttk.Frame):
         self.browser_button_short.grid(row=6, column=0, columnspan=2, padx=3, sticky=tk.NSEW)
 
         # View Top Readers Button
-        self.top_readers_button = ttk.Button(self, text='4. Top 10 Readers',
+        self.top_readers_button = ttk.Button(self, text=f"4. Top {args.get('top') or 10} Readers",
                                              command=self.view_top_readers_button_clicked)
         self.top_readers_button.grid(row=7, column=0, columnspan=2, padx=3, sticky=tk.NSEW)
 
         # View Top Documents
-        self.top_documents_button = ttk.Button(self, text='5d. Top 10 Documents', command=self.view_top_documents)
+        self.top_documents_button = ttk.Button(self, text=f"5d. Top {args.get('top') or 10} Documents",
+                                               command=self.view_top_documents)
         self.top_documents_button.grid(row=8, column=0, columnspan=2, padx=3, sticky=tk.NSEW)
 
         # View 'Also Likes' Graph
@@ -130,6 +138,9 @@ class View(ttk.Frame):
         self.message_label = ttk.Label(self, text='', foreground='red')
         self.message_label.grid(row=10, column=0, columnspan=2, sticky=tk.NSEW)
 
+        # Progress message shown while the Controller computes, if any
+        self._busy_message = None
+
         # Set Controller
         self.controller = None
 
@@ -190,6 +201,31 @@ class View(ttk.Frame):
         """Hide any kind of messages being displayed on the GUI"""
         self.message_label['text'] = ''
 
+    def show_busy(self, message):
+        """
+        Display a progress message while a computation runs in the background
+
+        The window stays responsive meanwhile, and buttons clicked now run once the current computation is done.
+
+        Parameters
+        ----------
+        message: str
+            Message to be displayed on the GUI
+
+        """
+        self._busy_message = message
+        self.message_label['text'] = message
+        self.message_label['foreground'] = 'blue'
+        self.winfo_toplevel().config(cursor='watch')
+
+    def show_idle(self):
+        """Remove the progress message once every background computation is done"""
+        # Success and error messages shown meanwhile are left for their usual 5 seconds
+        if self.message_label['text'] == self._busy_message:
+            self.hide_message()
+        self._busy_message = None
+        self.winfo_toplevel().config(cursor='')
+
     def view_country_button_clicked(self):
         """
         Signals controller that country histograms were requested
@@ -229,19 +265,21 @@ class View(ttk.Frame):
 
     def view_listbox(self, readers_list):
         """
-        Displays Top 10 Readers in new GUI window
+        Displays Top Readers in new GUI window
 
         Unlike other GUI methods, this one works in reserve order. When Top Readers button is clicked,
-        it asks Controller to get the top readers from Model and then this function is invoked with that list.
+        it asks Controller to get the top readers from Model and then this function is invoked with that list,
+        once the Model is done computing it.
 
         Parameters
         ----------
         readers_list: list
-            List containing top 10 readers and their read times
+            List containing top readers and their read times
         """
-        # Create a new tkinter window to display top readers
-        readers_window = tk.Tk()
-        readers_window.title('Top 10 Readers')
+        # Create a new window of this application to display top readers. A Toplevel, not a second Tk with its own
+        # mainloop, so results of background computations keep being delivered while it is open.
+        readers_window = tk.Toplevel(self)
+        readers_window.title(f'Top {len(readers_list)} Readers')
         # Create Tree view widget and add columns/headings
         columns = ('visitor_uuid', 'read_time')
         tree = ttk.Treeview(readers_window, columns=columns, show='headings')
@@ -252,8 +290,6 @@ class View(ttk.Frame):
         for reader in readers_list:
             tree.insert('', tk.END, values=reader)
         tree.grid(row=0, column=0, sticky='nsew')
-        # Run the window containing tree widget
-        readers_window.mainloop()
 
     def view_top_documents(self):
         """Signals to controller that top documents were requested"""
@@ -276,36 +312,38 @@ class View(ttk.Frame):
         """
         direc = os.getcwd()
         filename = filedialog.askopenfilename(initialdir=direc, title='Select a File',
-                                              filetypes=[("JSON Files", "*.json")])
+                                              filetypes=[("JSON Files", "*.json *.json.gz *.json.bz2 *.json.xz"),
+                                                         ("All Files", "*")])
+        # A cancelled dialog returns '', or () on some Tk builds, and must keep the current dataset
+        if not isinstance(filename, str) or not filename:
+            return
         if self.controller:
             self.controller.select_data(filename)
 
     def view_top_documents_listbox(self, dic):
         """
-        Displays Top 10 Documents in a new GUI window
+        Displays Top Documents in a new GUI window
 
         Parameters
         ----------
         dic
-            sorted dictionary containing documents with their reader count
+            sorted dictionary containing full document IDs with their reader count
 
         """
-        # Create a new tkinter window to display top documents
-        documents_window = tk.Tk()
-        documents_window.title('Top 10 Documents')
+        # Create a new window of this application to display top documents
+        documents_window = tk.Toplevel(self)
+        documents_window.title(f'Top {len(dic)} Documents')
 
         # Create Tree view widget and add columns/headings
         columns = ('document_uuid', 'num_readers')
         tree = ttk.Treeview(documents_window, columns=columns, show='headings')
-        tree.heading('document_uuid', text='Document UUID (last 4 digit)')
+        tree.heading('document_uuid', text='Document UUID (last digits)')
         tree.heading('num_readers', text='Number of Readers')
 
         # Loop over reader list and add to tree widget
-        for key, value in dic.items():
+        for key, value in zip(abbreviate(dic), dic.values()):
             tree.insert('', tk.END, values=(key, value))
         tree.grid(row=0, column=0, sticky='nsew')
-        # Run the window containing tree widget
-        documents_window.mainloop()
 
     def view_also_likes(self):
         """Signals to controller that Also Likes Graph was requested"""
@@ -0,0 +1,117 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Module for running Model computations off the Tk thread.
+
+Tkinter widgets and matplotlib figures may only be used from the thread running the mainloop, so a computation that
+takes seconds freezes the whole window. Worker runs computations on a background thread instead. Their results are
+put on a queue, which the Tk thread polls with after() and passes to callbacks, so widgets and figures are still only
+touched from the Tk thread.
+
+Notes
+------
+There is a single worker thread. The Model, its indexes and its result cache are not thread safe, so computations run
+one at a time, in the order they were requested, while the window stays responsive.
+"""
+
+# Milliseconds between two polls of the result queue while computations are pending
+POLL_INTERVAL = 50
+
+
+class Worker:
+    """
+    Runs computations on a background thread and their callbacks on the Tk thread
+
+    Parameters
+    ----------
+    widget: tkinter.Widget
+        Any widget of the window, used to schedule polls with after()
+
+    on_idle: callable, optional
+        Called on the Tk thread once every pending computation is done, e.g. to clear a busy indicator
+
+    Methods
+    -------
+    submit(compute, on_done, on_error=None, errors=(KeyError, ValueError))
+        Runs compute() on the worker thread, then on_done(result) or on_error(error) on the Tk thread
+
+    shutdown
+        Stops the worker thread, cancelling computations that have not started
+    """
+
+    def __init__(self, widget, on_idle=None):
+        self.widget = widget
+        self.on_idle = on_idle
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+        self._results = queue.Queue()
+        self.pending = 0
+        self._polling = False
+
+    def submit(self, compute, on_done=None, on_error=None, errors=(KeyError, ValueError)):
+        """
+        Run a computation in the background
+
+        Parameters
+        ----------
+        compute: callable
+            Function without arguments, run on the worker thread. It must not touch widgets or figures.
+
+        on_done: callable, optional
+            Called on the Tk thread with the result of compute
+
+        on_error: callable, optional
+            Called on the Tk thread with the exception if compute raised one of errors. Other exceptions are raised
+            again on the Tk thread, where Tk reports them like any other callback error.
+
+        errors: tuple, optional
+            Exception types passed to on_error
+        """
+        self.pending += 1
+        self._executor.submit(self._run, compute, on_done, on_error, errors)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_INTERVAL, self._poll)
+
+    def _run(self, compute, on_done, on_error, errors):
+        """Worker thread side: compute, and queue what the Tk thread should call next"""
+        try:
+            result = compute()
+        except errors as error:
+            if on_error is None:
+                self._results.put((_raise, error))
+            else:
+                self._results.put((on_error, error))
+        except Exception as error:
+            self._results.put((_raise, error))
+        else:
+            self._results.put((on_done, result))
+
+    def _poll(self):
+        """Tk thread side: run the callbacks of finished computations"""
+        try:
+            while True:
+                callback, value = self._results.get_nowait()
+                self.pending -= 1
+                try:
+                    if callback is not None:
+                        callback(value)
+                finally:
+                    if self.pending == 0 and self.on_idle is not None:
+                        self.on_idle()
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling while computations are running, otherwise stop until the next submit
+            if self.pending > 0:
+                self.widget.after(POLL_INTERVAL, self._poll)
+            else:
+                self._polling = False
+
+    def shutdown(self):
+        """Stop the worker thread without waiting for the running computation"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _raise(error):
+    raise error
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from readindex import encode
+
+"""
+Module for per-document country and continent counts, and counts of any column.
+
+Tasks 2a, 2b, 3a and 3b plot how often values occur. Rather than histogramming one string per row, the counts are
+computed first and drawn as bar charts, see charts.py, optionally keeping the top few values and summing the others
+with top_counts, so drawing does not depend on the number of events. With CountryCounts the counts of every
+document are precomputed in one pass over the dataset, as a single (document, country) count table, so a histogram
+for any document is a lookup. Continent counts are never mapped row by row: they are the country counts of the
+document summed per continent.
+"""
+
+
+def value_counts(values: pd.Series) -> pd.Series:
+    """
+    Number of rows per distinct value, without missing values
+
+    Returns
+    -------
+    pandas.Series
+        Counts indexed by value, in order of first appearance, as a histogram of the rows would show them
+    """
+    codes, uniques = pd.factorize(values)
+    return pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=np.asarray(uniques, dtype=object),
+                     dtype=np.int64)
+
+
+def country_counts(countries: pd.Series) -> pd.Series:
+    """Number of rows per country code, in order of first appearance, see value_counts"""
+    return value_counts(countries)
+
+
+def top_counts(counts: pd.Series, n=None, other='Other') -> pd.Series:
+    """
+    Largest counts first, with the counts after the first n summed into one last entry
+
+    Parameters
+    ----------
+    counts: pandas.Series
+        Counts indexed by value, e.g. as returned by value_counts
+
+    n: int, optional
+        Number of values kept. Default is None, which keeps them all.
+
+    other: str, optional
+        Label of the sum of the other counts. A value with the same label is summed into it rather than kept.
+
+    Returns
+    -------
+    pandas.Series
+        At most n + 1 counts, largest first and ties in their original order, with the same total as counts
+    """
+    # A stable sort keeps values with the same count in order of first appearance
+    counts = counts.iloc[np.argsort(-counts.to_numpy(), kind='stable')]
+    if n is None or len(counts) <= n:
+        return counts
+    # A value already labelled like the sum would give two entries with the same label, so it joins the sum
+    top = counts[counts.index != other].iloc[:n]
+    rest = counts.sum() - top.sum()
+    return pd.concat([top, pd.Series([rest], index=[other], dtype=counts.dtype)])
+
+
+def continent_counts(countries: pd.Series, converter) -> pd.Series:
+    """
+    Sum country counts per continent
+
+    Parameters
+    ----------
+    countries: pandas.Series
+        Counts indexed by country code, as returned by country_counts
+
+    converter: convert.Convert
+        Converter from country codes to continent names
+
+    Returns
+    -------
+    pandas.Series
+        Counts indexed by continent name, in order of first appearance. Unknown country codes are left out.
+    """
+    # One lookup per distinct country, then the counts are summed per continent position
+    positions = converter.continent_index_many(countries.index, errors='coerce')
+    known = positions >= 0
+    totals = np.bincount(positions[known], weights=countries.to_numpy()[known],
+                         minlength=len(converter.continent_names))
+    order = pd.unique(positions[known])
+    return pd.Series(totals[order].astype(np.int64), index=converter.continent_names[order], dtype=np.int64)
+
+
+class CountryCounts:
+    """
+    Country counts of every document of a dataset, computed in one pass
+
+    Parameters
+    ----------
+    document_codes: numpy.ndarray
+        Document code of every row, e.g. ReadIndex.document_codes_by_row
+
+    countries: pandas.Series
+        visitor_country column of the same rows
+
+    Methods
+    -------
+    countries(document: int)
+        Returns the country counts of a document
+    """
+
+    def __init__(self, document_codes, countries: pd.Series):
+        country_codes, self.country_ids = encode(countries)
+        known = np.flatnonzero((document_codes >= 0) & (country_codes >= 0))
+        n_countries = max(len(self.country_ids), 1)
+        keys = document_codes[known].astype(np.int64) * n_countries + country_codes[known]
+        # One entry per (document, country), with its number of rows and the position of its first row
+        keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        documents, countries = np.divmod(keys, n_countries)
+        # Within each document, order countries by first appearance, as a histogram of the rows would
+        order = np.lexsort((known[first], documents))
+        self._countries, self._counts = countries[order].astype(np.int32), counts[order]
+        n_documents = int(document_codes.max()) + 1 if len(document_codes) else 0
+        self._indptr = np.zeros(n_documents + 1, dtype=np.int64)
+        np.cumsum(np.bincount(documents, minlength=n_documents), out=self._indptr[1:])
+
+    def countries(self, document: int) -> pd.Series:
+        """Counts of a document indexed by country code, in order of first appearance"""
+        if document < 0 or document + 1 >= len(self._indptr):
+            return pd.Series([], dtype=np.int64)
+        start, end = self._indptr[document], self._indptr[document + 1]
+        return pd.Series(self._counts[start:end], index=self.country_ids[self._countries[start:end]], dtype=np.int64)
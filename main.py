@@ -2,6 +2,7 @@ from app import App
 from parser import create_parser
 from tasks import run_tasks
 from gui.model import Model
+from report import run_report
 
 
 def main(args: dict):
@@ -11,7 +12,10 @@ def main(args: dict):
     # This model can be used to run coursework tasks directly or through GUI
     model = Model(args, '')
 
-    if args['task'] == '7' or args['task'] is None:
+    if args.get('report'):
+        # Save the requested charts to files, without a display
+        run_report(args, model)
+    elif args['task'] == '7' or args['task'] is None:
         # Create a Tkinter application and pass the parser dictionary to it
         app = App(args, model)
         # Start the GUI mainloop
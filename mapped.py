@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from data import get_data, MODEL_COLUMNS, SCHEMA
+
+"""
+Module for the memory-mapped binary dataset format.
+
+A dataset is a folder with one file per column. String columns (UUIDs, countries, user agents, event types) are
+interned: every distinct string is written once to a json dictionary file and the column itself is a .npy array of
+fixed-width integer codes into it. Nullable integers are a values array plus a mask array, other numbers are plain
+arrays. A manifest.json lists the columns.
+
+At load time the arrays are opened with numpy.memmap and wrapped in a dataframe without copying, so nothing is read
+from disk until a task touches it and concurrent processes share the OS page cache.
+
+Usage: python mapped.py issuu_cw2.json issuu_cw2.mapped
+"""
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def is_mapped(path: str) -> bool:
+    """True if path is a folder written by convert()"""
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def _code_dtype(size: int):
+    """Smallest integer type for codes into size strings. It matches what pandas uses so categoricals need no copy."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def convert(file_name: str, directory: str, columns=MODEL_COLUMNS) -> str:
+    """
+    Convert a JSON file into the memory-mapped format
+
+    Parameters
+    ----------
+    file_name: str
+        JSON file to convert
+
+    directory: str
+        Output folder, created if needed. Existing column files are overwritten.
+
+    columns: tuple, optional
+        Columns to keep. Default is the columns the Model uses.
+
+    Returns
+    -------
+    directory: str
+        The output folder
+    """
+    df = get_data(file_name, columns=columns, schema=SCHEMA)
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {'version': FORMAT_VERSION, 'rows': len(df), 'columns': []}
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series):
+            kind = 'nullable'
+            np.save(os.path.join(directory, f'{i}.values.npy'),
+                    series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+            np.save(os.path.join(directory, f'{i}.mask.npy'), series.isna().to_numpy())
+        elif pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            kind = 'numeric'
+            np.save(os.path.join(directory, f'{i}.values.npy'), series.to_numpy())
+        else:
+            # Intern the strings: codes into a dictionary of distinct values
+            kind = 'strings'
+            categorical = pd.Categorical(series)
+            categories = [str(value) for value in categorical.categories]
+            codes = categorical.codes.astype(_code_dtype(len(categories)))
+            np.save(os.path.join(directory, f'{i}.codes.npy'), codes)
+            with open(os.path.join(directory, f'{i}.dict.json'), 'w') as f:
+                json.dump(categories, f)
+        manifest['columns'].append({'name': str(column), 'kind': kind, 'dtype': str(series.dtype)})
+
+    # Manifest is written last so a half converted folder is never mistaken for a dataset
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return directory
+
+
+def load(directory: str) -> pd.DataFrame:
+    """
+    Open a dataset written by convert()
+
+    The column arrays are memory-mapped read-only and wrapped without copying. String columns come back as
+    categoricals whose codes are the mapped arrays.
+
+    Parameters
+    ----------
+    directory: str
+        Folder written by convert()
+
+    Raises
+    ------
+    ValueError
+        If the folder was written by an incompatible version
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Dataframe backed by the mapped files
+    """
+    print("Mapping data..")
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported mapped dataset version {manifest['version']}")
+
+    def mapped(name):
+        return np.load(os.path.join(directory, name), mmap_mode='r')
+
+    columns = {}
+    for i, entry in enumerate(manifest['columns']):
+        if entry['kind'] == 'nullable':
+            values = pd.arrays.IntegerArray(mapped(f'{i}.values.npy'), mapped(f'{i}.mask.npy'))
+        elif entry['kind'] == 'numeric':
+            values = mapped(f'{i}.values.npy')
+        else:
+            with open(os.path.join(directory, f'{i}.dict.json')) as f:
+                categories = json.load(f)
+            values = pd.Categorical.from_codes(mapped(f'{i}.codes.npy'), dtype=pd.CategoricalDtype(categories))
+        columns[entry['name']] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+if __name__ == '__main__':
+    my_parser = argparse.ArgumentParser(description='Convert a JSON dataset into the memory-mapped format')
+    my_parser.add_argument('file_name', type=str, help='File name containing JSON data')
+    my_parser.add_argument('directory', type=str, help='Output folder')
+    my_args = my_parser.parse_args()
+    convert(my_args.file_name, my_args.directory)
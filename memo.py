@@ -0,0 +1,124 @@
+import copy
+import functools
+import inspect
+import sys
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+"""
+Module for memoizing query results.
+
+The GUI and batch scripts ask the same questions over and over: readers of a document, documents of a user, top
+documents, top readers. ResultCache keeps recent answers in memory, keyed by the dataset they were computed on, the
+query and its arguments, and evicts the least recently used ones once it holds too many entries or too many bytes.
+
+Notes
+------
+Use the cached decorator on methods of an object with a `results` ResultCache and a `dataset_key` attribute.
+Arguments must be hashable. Exceptions are not cached, and callers get a shallow copy of the cached value so they can
+modify it freely.
+"""
+
+# Default budgets
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 ** 2
+
+
+def sizeof(value) -> int:
+    """Rough size in bytes of a query result"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of query results
+
+    Parameters
+    ----------
+    max_entries: int, optional
+        Most results kept. 0 disables the cache.
+
+    max_bytes: int, optional
+        Most bytes kept, as estimated by sizeof. Larger results are never cached.
+
+    Methods
+    -------
+    get(key)
+        Returns (True, value) for a cached key, (False, None) otherwise
+
+    put(key, value)
+        Caches a value, evicting the least recently used ones if needed
+
+    clear
+        Drops every cached value
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key) -> tuple:
+        """Look key up, counting a hit or a miss"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        """Cache value under key"""
+        size = sizeof(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def clear(self):
+        """Drop every cached value, e.g. when the dataset changes. Hit and miss counts are kept."""
+        self._entries.clear()
+        self.size = 0
+
+
+def cached(method):
+    """
+    Decorator memoizing a method in self.results, keyed by (self.dataset_key, method name, arguments)
+
+    Arguments are bound to the signature first, so f(1), f(x=1) and f(1, default) share one entry.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (self.dataset_key, method.__name__, tuple(bound.arguments.items())[1:])
+        hit, value = self.results.get(key)
+        if not hit:
+            value = method(self, *args, **kwargs)
+            self.results.put(key, value)
+        return copy.copy(value)
+
+    return wrapper
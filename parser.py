@@ -1,4 +1,6 @@
 import argparse
+from decoders import DECODERS
+from sorters import SORTERS
 
 """
 Create a parser for Issuu Data Analysis application
@@ -13,13 +15,57 @@ def create_parser():
     my_parser.add_argument('-u', '--user_uuid', type=str, action='store', help='User id you want to query with')
     my_parser.add_argument('-d', '--document_uuid', type=str, action='store', help='Document id you want to query with')
     my_parser.add_argument('-url', type=str, action='store', help='URL of the json file')
+    my_parser.add_argument('--download-threads', type=int, action='store',
+                           help='Parallel connections for -url if the server supports range requests')
     my_parser.add_argument('-t', '--task', type=str, action='store',
                            choices=['2a', '2b', '3a', '3b', '4', '5d', '6', '7'],
                            help='Coursework task that you want to test')
-    my_parser.add_argument('-s', '--sorter', type=str, action='store', help='Sorter for Task 5d')
+    my_parser.add_argument('-n', '--top', type=int, action='store',
+                           help='Number of readers or documents listed by Tasks 4 and 5d, default 10')
+    my_parser.add_argument('-s', '--sorter', type=str, action='store', choices=list(SORTERS),
+                           help='Sorter for Task 5d, defaults to alphabetical on document IDs')
+    my_parser.add_argument('--cooccurrence', action='store_true',
+                           help='Precompute document co-occurrence counts, for many Task 5d/6 queries on one dataset')
+    my_parser.add_argument('--precompute-histograms', action='store_true',
+                           help='Count the countries of every document at once, for many Task 2a/2b histograms')
+    my_parser.add_argument('--decoder', type=str, action='store', choices=list(DECODERS),
+                           help='JSON decoder backend, defaults to the fastest one installed')
+    my_parser.add_argument('-j', '--workers', type=int, action='store',
+                           help='Number of processes parsing the JSON file in parallel')
+    my_parser.add_argument('--no-cache', action='store_true', help='Always parse the JSON file, skip the dataset cache')
+    my_parser.add_argument('--rebuild-cache', action='store_true',
+                           help='Parse the JSON file again and overwrite its cached snapshot')
+    my_parser.add_argument('--cache-dir', type=str, action='store', help='Folder of the dataset cache')
+    my_parser.add_argument('--cache-size', type=int, action='store',
+                           help='Size limit of the dataset cache in MB, shared by parsed snapshots and url bodies')
+    my_parser.add_argument('--result-cache-entries', type=int, action='store',
+                           help='Number of query results kept in memory, default 512, 0 disables the result cache')
+    my_parser.add_argument('--result-cache-size', type=int, action='store',
+                           help='Size limit of the query results kept in memory in MB, default 64')
+    my_parser.add_argument('--single-buffer', action='store_true',
+                           help='Release the current dataset before loading another one in the GUI, lowering peak '
+                                'memory, but queries wait for the new dataset')
+    my_parser.add_argument('--graph-top', type=int, action='store',
+                           help='Documents shown by Task 6 besides the input one, the most co-read ones, default all')
+    my_parser.add_argument('--graph-min-support', type=int, action='store',
+                           help='Smallest number of readers of the input document a Task 6 document must have, '
+                                'default 1')
+    my_parser.add_argument('--graph-max-readers', type=int, action='store',
+                           help='Readers shown by Task 6, the ones who read the most documents shown, default all')
+    my_parser.add_argument('--chart-top', type=int, action='store',
+                           help='Values with a bar of their own in Task 2a/2b/3a/3b charts, the others are summed into '
+                                'one, default 20, 0 for all')
+    my_parser.add_argument('--report', type=str, action='store', metavar='DIRECTORY',
+                           help='Save charts to this folder instead of showing them, see report.py')
+    my_parser.add_argument('--documents', type=str, action='store',
+                           help='File listing one document id per line, for --report along with -d')
+    my_parser.add_argument('--charts', type=str, nargs='+', choices=['2a', '2b', '3a', '3b', '6'],
+                           help='Charts saved by --report, defaults to all of them')
+    my_parser.add_argument('--formats', type=str, nargs='+', choices=['png', 'svg', 'pdf'],
+                           help='File formats saved by --report, defaults to png')
     requiredNamed = my_parser.add_argument_group('required named arguments')
-    requiredNamed.add_argument('-f', '--file_name', type=str, action='store', help='File name containing JSON data',
-                               required=True)
+    requiredNamed.add_argument('-f', '--file_name', type=str, action='store', required=True,
+                               help='File name containing JSON data, or a folder converted with mapped.py')
 
     # Save parsed options into a Namespace object
     my_args = my_parser.parse_args()
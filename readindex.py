@@ -0,0 +1,213 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from data import category_mask
+
+"""
+Module for integer coded reader and document identities.
+
+visitor_uuid and subject_doc_id are long strings, and the "also likes" tasks compare and count them in their inner
+loops. Here both columns are factorized once per dataset into dense int32 codes, and the read events are grouped into
+two sparse indexes over those codes:
+
+    readers_of[d] = every distinct reader of document d, in any environment
+    reads[r]      = every distinct document read by reader r in the reader environment
+
+read_counts has the same entries as reads, with the number of read events of every pair instead of a 1.
+
+Sets, counts and graphs are then computed on integers, and codes are decoded back into IDs only for display.
+Codes are unique per full ID, so two documents sharing their last characters are no longer merged.
+"""
+
+# Compressed sparse row matrix. Row i holds columns indices[indptr[i]:indptr[i + 1]] with values data[...],
+# the same attributes as a scipy.sparse.csr_matrix so both can be read the same way.
+CSR = namedtuple('CSR', ['indptr', 'indices', 'data', 'shape'])
+
+# Number of characters shown for abbreviated IDs, unless more are needed to tell them apart
+ABBREVIATION = 4
+
+
+def encode(series: pd.Series) -> tuple:
+    """
+    Factorize a column of IDs into dense int32 codes
+
+    Returns
+    -------
+    tuple
+        Code of every row (-1 where the ID is missing) and the array of IDs indexed by code
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Mapped and cached datasets may already be categorical, so their codes are reused as they are
+        return np.asarray(series.array.codes, dtype=np.int32), np.asarray(series.cat.categories, dtype=object)
+    codes, ids = pd.factorize(series)
+    return codes.astype(np.int32), np.asarray(ids, dtype=object)
+
+
+def csr_from_pairs(rows, cols, shape, sort=True, counts=False) -> CSR:
+    """
+    Build a CSR matrix from (row, column) pairs, which may contain duplicates
+
+    Parameters
+    ----------
+    rows, cols: numpy.ndarray
+        Integer coordinates of the non zero entries
+
+    shape: tuple
+        Number of rows and columns
+
+    sort: bool, optional
+        Default is True, which sorts the columns of each row. If False, they are kept in order of first appearance.
+
+    counts: bool, optional
+        Default is False, which stores a 1 for every distinct pair. If True, the number of times the pair was found.
+
+    Returns
+    -------
+    CSR
+        Matrix with one entry for every distinct pair
+    """
+    keys = rows.astype(np.int64) * shape[1] + cols
+    # Sorted keys group rows with their columns sorted, pd.factorize keeps pairs in order of first appearance instead
+    if sort:
+        keys, data = np.unique(keys, return_counts=True)
+    else:
+        positions, keys = pd.factorize(keys)
+        data = np.bincount(positions, minlength=len(keys))
+    rows, cols = np.divmod(keys, shape[1])
+    if not sort:
+        order = np.argsort(rows, kind='stable')
+        rows, cols, data = rows[order], cols[order], data[order]
+    indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+    data = data.astype(np.int32) if counts else np.ones(len(cols), dtype=np.int32)
+    return CSR(indptr, cols.astype(np.int32), data, shape)
+
+
+def gather(matrix: CSR, rows, values=False) -> np.ndarray:
+    """Columns of several rows of matrix, or their values if values is True, concatenated in the order of rows"""
+    starts, ends = matrix.indptr[rows], matrix.indptr[np.asarray(rows) + 1]
+    lengths = ends - starts
+    # Position of every gathered entry: the start of its row plus its offset within the row
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return (matrix.data if values else matrix.indices)[np.repeat(starts, lengths) + offsets]
+
+
+def abbreviate(ids, length=ABBREVIATION) -> list:
+    """
+    Abbreviate IDs to their last characters for display
+
+    Parameters
+    ----------
+    ids: iterable of str
+        IDs shown together, e.g. the documents of one table or graph
+
+    length: int, optional
+        Number of characters kept. More are kept, for all of the IDs, if two distinct IDs would look the same.
+
+    Returns
+    -------
+    list
+        Abbreviated IDs, in the same order
+    """
+    ids = list(ids)
+    distinct = set(ids)
+    longest = max((len(i) for i in distinct), default=0)
+    while length < longest and len({i[-length:] for i in distinct}) < len(distinct):
+        length += 1
+    return [i[-length:] for i in ids]
+
+
+class ReadIndex:
+    """
+    Integer codes of readers and documents, and who read what, for one dataset
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Dataset with at least visitor_uuid, subject_doc_id, subject_type, event_type and env_type
+
+    Methods
+    -------
+    reader_code(user_uuid: str)
+        Returns the code of a reader, or -1 if unknown
+
+    document_code(doc_uuid: str)
+        Returns the code of a document, or -1 if unknown
+
+    reader_codes(user_uuids: list)
+        Returns the codes of several readers
+
+    readers(document: int)
+        Returns the codes of every reader of a document
+
+    documents(reader: int)
+        Returns the codes of every document read by a reader in the reader environment
+
+    rows(document: int)
+        Returns the positions of every row of the dataset about a document
+    """
+
+    def __init__(self, df):
+        # Codes of every row, so later indexes can also map IDs to rows of the dataset
+        self.reader_codes_by_row, self.reader_ids = encode(df['visitor_uuid'])
+        self.document_codes_by_row, self.document_ids = encode(df['subject_doc_id'])
+        self._readers = pd.Index(self.reader_ids)
+        self._documents = pd.Index(self.document_ids)
+        n_readers, n_documents = len(self.reader_ids), len(self.document_ids)
+
+        # subject_type and event_type are categorical, so these masks compare integer codes rather than strings
+        reads = category_mask(df['subject_type'], 'doc') & category_mask(df['event_type'], 'read')
+        in_reader = category_mask(df['env_type'], 'reader')[reads]
+        readers, documents = self.reader_codes_by_row[reads], self.document_codes_by_row[reads]
+        known = (readers >= 0) & (documents >= 0)
+        self.readers_of = csr_from_pairs(documents[known], readers[known], (n_documents, n_readers), sort=False)
+        # Some doc_ids are NaN, those reads are dropped. Such users still count as readers, with fewer documents.
+        self.read_counts = csr_from_pairs(readers[known & in_reader], documents[known & in_reader],
+                                          (n_readers, n_documents), sort=False, counts=True)
+        # Same entries with a 1 each, sharing the indptr and indices arrays
+        self.reads = self.read_counts._replace(data=np.ones(len(self.read_counts.indices), dtype=np.int32))
+        self.active = np.zeros(n_readers, dtype=bool)
+        self.active[readers[in_reader & (readers >= 0)]] = True
+        # Rows of every document, built on first use by rows()
+        self._row_order = None
+        self._row_indptr = None
+
+    @staticmethod
+    def _code(index: pd.Index, value) -> int:
+        try:
+            return int(index.get_loc(value))
+        except (KeyError, TypeError):
+            return -1
+
+    def reader_code(self, user_uuid: str) -> int:
+        """Code of user_uuid, or -1 if it is not in the dataset"""
+        return self._code(self._readers, user_uuid)
+
+    def document_code(self, doc_uuid: str) -> int:
+        """Code of doc_uuid, or -1 if it is not in the dataset"""
+        return self._code(self._documents, doc_uuid)
+
+    def reader_codes(self, user_uuids: list) -> np.ndarray:
+        """Codes of several readers, -1 for unknown ones"""
+        return self._readers.get_indexer(list(user_uuids)).astype(np.int32)
+
+    def readers(self, document: int) -> np.ndarray:
+        """Codes of every distinct reader of a document, in order of first appearance"""
+        return self.readers_of.indices[self.readers_of.indptr[document]:self.readers_of.indptr[document + 1]]
+
+    def documents(self, reader: int) -> np.ndarray:
+        """Codes of every distinct document read by a reader in the reader environment, in order of first appearance"""
+        return self.reads.indices[self.reads.indptr[reader]:self.reads.indptr[reader + 1]]
+
+    def rows(self, document: int) -> np.ndarray:
+        """Positions of every row of the dataset about a document, whatever the event, in ascending order"""
+        if self._row_order is None:
+            codes = self.document_codes_by_row
+            known = np.flatnonzero(codes >= 0)
+            # Row positions grouped by document, a stable sort keeps them ascending within each document
+            self._row_order = known[np.argsort(codes[known], kind='stable')]
+            self._row_indptr = np.zeros(len(self.document_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes[known], minlength=len(self.document_ids)), out=self._row_indptr[1:])
+        if document < 0:
+            return self._row_order[:0]
+        return self._row_order[self._row_indptr[document]:self._row_indptr[document + 1]]
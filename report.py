@@ -0,0 +1,186 @@
+import os
+import matplotlib.pyplot as plt
+import graphviz
+import charts
+from timer import timer
+
+"""
+Module rendering charts and graphs to files, without a display.
+
+Report draws the charts of Tasks 2a, 2b, 3a, 3b and the graph of Task 6 for a list of documents in one process: the
+dataset and its indexes are loaded once by the Model, counts come from the Model (and its result cache), and each kind
+of chart reuses a single matplotlib figure, cleared between documents, instead of creating one per chart.
+
+Usage: python main.py -f issuu_cw2.json --report out --documents ids.txt --formats png svg --charts 2a 2b 6
+"""
+
+# Tasks that can be saved, and file formats
+CHARTS = ('2a', '2b', '3a', '3b', '6')
+FORMATS = ('png', 'svg', 'pdf')
+
+
+def read_documents(file_name: str) -> list:
+    """Document IDs listed one per line in a file, without blank lines and duplicates"""
+    with open(file_name) as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+class Report:
+    """
+    Render charts and graphs of a Model to an output folder
+
+    Parameters
+    ----------
+    model: gui.model.Model
+        Model of the loaded dataset
+
+    directory: str
+        Output folder, created if needed
+
+    formats: tuple, optional
+        File formats among png, svg and pdf. Default is png only.
+
+    Methods
+    -------
+    countries(doc_uuid: str)
+        Saves the country chart of a document
+
+    continents(doc_uuid: str)
+        Saves the continent chart of a document
+
+    long_browsers
+        Saves the long browser name chart
+
+    short_browsers
+        Saves the short browser name chart
+
+    also_likes(doc_uuid: str, user_uuid: str)
+        Saves the also likes graph of a document, and renders it if Graphviz is installed
+
+    run(documents: list, tasks: tuple, user_uuid: str)
+        Saves every requested chart of every document
+    """
+
+    def __init__(self, model, directory, formats=('png',)):
+        for file_format in formats:
+            if file_format not in FORMATS:
+                raise ValueError(f"Unknown format {file_format}, choose from {', '.join(FORMATS)}")
+        # Files only, so no display is needed
+        plt.switch_backend('Agg')
+        self.model = model
+        self.directory = directory
+        self.formats = tuple(formats)
+        self._figures = {}
+        # Set once rendering a graph failed because the Graphviz executables are missing
+        self._dot_missing = False
+        os.makedirs(directory, exist_ok=True)
+
+    def _save(self, chart: str, name: str, *args) -> list:
+        """Draw a chart of charts.py on its figure, cleared first, and save it in every format"""
+        fig = self._figures.get(chart)
+        if fig is None:
+            fig = self._figures[chart] = plt.figure(figsize=charts.FIGSIZE[chart])
+        fig.clf()
+        getattr(charts, chart)(fig, fig.add_subplot(1, 1, 1), *args, top=charts.chart_top(self.model.args))
+        paths = [os.path.join(self.directory, f'{name}.{file_format}') for file_format in self.formats]
+        for path in paths:
+            fig.savefig(path)
+        return paths
+
+    def countries(self, doc_uuid: str) -> list:
+        """Save the country chart of doc_uuid, returns the paths written"""
+        return self._save('countries', f'{doc_uuid}_countries', self.model.country_counts(doc_uuid), doc_uuid)
+
+    def continents(self, doc_uuid: str) -> list:
+        """Save the continent chart of doc_uuid, returns the paths written"""
+        return self._save('continents', f'{doc_uuid}_continents', self.model.continent_counts(doc_uuid), doc_uuid)
+
+    def long_browsers(self) -> list:
+        """Save the long browser name chart of the dataset"""
+        return self._save('long_browsers', 'long_browsers', self.model.long_browser_counts())
+
+    def short_browsers(self) -> list:
+        """Save the short browser name chart of the dataset"""
+        return self._save('short_browsers', 'short_browsers', self.model.short_browser_counts())
+
+    def also_likes(self, doc_uuid: str, user_uuid: str = None) -> list:
+        """
+        Save the DOT source of the also likes graph of doc_uuid, and render it in every format
+
+        The source is always written. Rendering needs the Graphviz executables, and is skipped with a message if
+        they are not installed.
+        """
+        name = f'{doc_uuid}_also_likes'
+        source = self.model.write_also_likes(doc_uuid, user_uuid, os.path.join(self.directory, f'{name}.gv'))
+        paths = [source]
+        if self._dot_missing:
+            return paths
+        for file_format in self.formats:
+            try:
+                # The source is rendered once per format, into e.g. {name}.png
+                paths.append(graphviz.render('dot', file_format, source,
+                                             outfile=os.path.join(self.directory, f'{name}.{file_format}')))
+            except graphviz.ExecutableNotFound:
+                print("Graphviz is not installed, only DOT sources of the graphs are written.")
+                self._dot_missing = True
+                break
+        return paths
+
+    @timer
+    def run(self, documents, tasks=CHARTS, user_uuid=None) -> list:
+        """
+        Save every requested chart
+
+        Parameters
+        ----------
+        documents: list
+            Document IDs. Documents that are not found are reported and skipped.
+
+        tasks: tuple, optional
+            Tasks among 2a, 2b, 3a, 3b and 6. Default is all of them.
+
+        user_uuid: str, optional
+            Input user ID of the also likes graphs
+
+        Returns
+        -------
+        list
+            Paths of every file written
+        """
+        paths = []
+        if '3a' in tasks:
+            paths += self.long_browsers()
+        if '3b' in tasks:
+            paths += self.short_browsers()
+        for doc_uuid in documents:
+            try:
+                # Validated like a document entered in the GUI
+                self.model.document_id = doc_uuid
+                if '2a' in tasks:
+                    paths += self.countries(doc_uuid)
+                if '2b' in tasks:
+                    paths += self.continents(doc_uuid)
+                if '6' in tasks:
+                    paths += self.also_likes(doc_uuid, user_uuid)
+            except (KeyError, ValueError) as error:
+                print(f'Skipping {doc_uuid}: {error}')
+        print(f'{len(paths)} files written to {self.directory}')
+        return paths
+
+    def close(self):
+        """Release the figures"""
+        for fig in self._figures.values():
+            plt.close(fig)
+        self._figures = {}
+
+
+def run_report(args: dict, model) -> list:
+    """Render the report asked for on the command line"""
+    documents = [args['document_uuid']] if args.get('document_uuid') else []
+    if args.get('documents'):
+        documents += read_documents(args['documents'])
+    report = Report(model, args['report'], args.get('formats') or ('png',))
+    try:
+        return report.run(documents, tuple(args.get('charts') or CHARTS), args.get('user_uuid'))
+    finally:
+        report.close()
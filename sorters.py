@@ -1,13 +1,81 @@
+import heapq
+
 """
-Module for various sorters.
+Module for the orderings of Task 5d.
+
+Every sorter takes the precomputed counts of documents, as returned by Model.counter, and the number of documents
+wanted, and returns the top k as a dictionary in display order. Only k entries are ever kept, on a heap, so a hub
+document with hundreds of thousands of co-read documents is never sorted in full.
 
 Notes
 ------
-CW Spec does not specify how many to implement, so only implemented one.
+Sorters are registered by name with the register decorator. Use get_sorter() to look one up, and SORTERS for the
+names accepted by -s/--sorter.
 """
 
+# All sorters by name, as (function, description) pairs
+SORTERS = {}
+
+# Sorter used when none is named
+DEFAULT_SORTER = 'key'
+
+
+def register(name: str, description: str):
+    """
+    Decorator adding a sorter to SORTERS
+
+    Parameters
+    ----------
+    name: str
+        Name accepted by -s/--sorter
+
+    description: str
+        Short description of the ordering, printed above the results
+    """
+    def decorator(sorter):
+        SORTERS[name] = (sorter, description)
+        return sorter
+    return decorator
+
+
+@register('key', 'alphabetical on keys')
+def key(records: dict, k=10) -> dict:
+    """The k first documents in alphabetical order of their IDs"""
+    return dict(heapq.nsmallest(k, records.items(), key=lambda item: item[0]))
+
+
+@register('desc', 'descending on values')
+def desc(records: dict, k=10) -> dict:
+    """The k documents with the most readers. Ties keep the order in which the documents were counted."""
+    return dict(heapq.nlargest(k, records.items(), key=lambda item: item[1]))
+
+
+@register('count', 'descending on values, ties on keys')
+def count(records: dict, k=10) -> dict:
+    """The k documents with the most readers. Ties are ordered on document ID, so the result is deterministic."""
+    return dict(heapq.nsmallest(k, records.items(), key=lambda item: (-item[1], item[0])))
+
+
+def get_sorter(name=None) -> tuple:
+    """
+    Get a sorter and its description
+
+    Parameters
+    ----------
+    name: str, optional
+        Name of the sorter. Default is None, which returns the alphabetical sorter.
+
+    Raises
+    ------
+    ValueError
+        If no sorter is registered under that name
 
-def desc(readers: list, counter, doc_uuid: str, user_uuid: str) -> dict:
-    records = counter(readers, doc_uuid, user_uuid)
-    sorted_dic = dict(sorted(records.items(), key=lambda item: item[1], reverse=True))
-    return sorted_dic
+    Returns
+    -------
+    tuple
+        Function taking (records, k) and returning the top k records, and its description
+    """
+    name = DEFAULT_SORTER if name is None else name
+    if name not in SORTERS:
+        raise ValueError(f"Sorter '{name}' does not exist. Choose from: {', '.join(SORTERS)}")
+    return SORTERS[name]
@@ -0,0 +1,94 @@
+import unittest
+import os
+import re
+import tempfile
+import pandas as pd
+from also_likes import AlsoLikesGraph, Graph
+from readindex import ReadIndex
+
+
+def reads(pairs):
+    """Dataset of read events in the reader environment, from (reader, document) pairs"""
+    return pd.DataFrame({'visitor_uuid': [reader for reader, _ in pairs],
+                         'subject_doc_id': [document for _, document in pairs],
+                         'subject_type': 'doc', 'event_type': 'read', 'env_type': 'reader'})
+
+
+# Readers r1 to r4 read the hub document, r1 twice. d1 is co-read by three of them, d2 by two and d3 by one.
+PAIRS = [('r1', 'hub'), ('r1', 'd1'), ('r1', 'd2'), ('r1', 'hub'),
+         ('r2', 'hub'), ('r2', 'd1'), ('r2', 'd2'),
+         ('r3', 'hub'), ('r3', 'd1'), ('r3', 'd3'),
+         ('r4', 'hub'),
+         ('r5', 'd1')]
+
+
+class AlsoLikesTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.index = ReadIndex(reads(PAIRS))
+        self.hub = self.index.document_code('hub')
+
+    def build(self, builder, *args):
+        """Graph of builder with its nodes and edges read into lists"""
+        graph = builder.build(*args)
+        return Graph(list(graph.nodes), list(graph.edges), graph.legend)
+
+    def labels(self, graph, prefix):
+        return sorted(label for name, label, _ in graph.nodes if name.startswith(prefix))
+
+    def test_full_graph(self):
+        """Test every reader and document appears once, with one edge per document a reader read"""
+        graph = self.build(AlsoLikesGraph(self.index), self.hub)
+        names = [name for name, _, _ in graph.nodes]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(['r1', 'r2', 'r3', 'r4'], self.labels(graph, 'r'))
+        self.assertEqual(['d1', 'd2', 'd3', 'hub'], self.labels(graph, 'd'))
+        self.assertEqual(10, len(graph.edges))
+
+    def test_weights(self):
+        """Test edges are weighted by the number of read events, and repeated reads are drawn thicker"""
+        builder = AlsoLikesGraph(self.index)
+        graph = self.build(builder, self.hub)
+        r1 = self.index.reader_code('r1')
+        weights = {(tail, head): weight for tail, head, weight in graph.edges}
+        self.assertEqual(2, weights[(f'r{r1}', f'd{self.hub}')])
+        self.assertEqual(1, sum(weight > 1 for weight in weights.values()))
+        with tempfile.TemporaryDirectory() as directory:
+            path = builder.write(builder.build(self.hub), os.path.join(directory, 'graph.gv'))
+            with open(path) as f:
+                source = f.read()
+        self.assertIn(f'"r{r1}" -> "d{self.hub}" [label=2 penwidth=2]', source)
+        self.assertEqual(1, source.count('penwidth'))
+
+    def test_pruning(self):
+        """Test documents are kept by co-read count and readers by the number of kept documents they read"""
+        self.assertEqual(['d1', 'd2', 'hub'], self.labels(self.build(AlsoLikesGraph(self.index, top=2), self.hub), 'd'))
+        self.assertEqual(['d1', 'd2', 'hub'],
+                         self.labels(self.build(AlsoLikesGraph(self.index, min_support=2), self.hub), 'd'))
+        graph = self.build(AlsoLikesGraph(self.index, top=1, max_readers=2), self.hub)
+        self.assertEqual(['d1', 'hub'], self.labels(graph, 'd'))
+        self.assertEqual(['r1', 'r2'], self.labels(graph, 'r'))
+        self.assertRaises(ValueError, AlsoLikesGraph, self.index, top=-1)
+
+    def test_input_user(self):
+        """Test the input user gets one edge to the input document and their reads are not counted"""
+        graph = self.build(AlsoLikesGraph(self.index, min_support=2), self.hub, 'r1')
+        self.assertEqual(['d1', 'hub'], self.labels(graph, 'd'))
+        user = self.index.reader_code('r1')
+        self.assertEqual([('d' + str(self.hub))], [head for tail, head, _ in graph.edges if tail == f'r{user}'])
+
+    def test_write(self):
+        """Test the DOT file declares every node once and links the legend"""
+        builder = AlsoLikesGraph(self.index, top=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = builder.write(builder.build(self.hub, size='Size: 12'), os.path.join(directory, 'graph.gv'))
+            with open(path) as f:
+                source = f.read()
+        declarations = re.findall(r'^\t("[^"]+") \[', source, flags=re.MULTILINE)
+        self.assertEqual(len(declarations), len(set(declarations)))
+        self.assertIn('"Readers" -> "Documents" [label="Size: 12"]', source)
+        self.assertTrue(source.startswith('digraph {') and source.endswith('}\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
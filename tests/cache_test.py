@@ -0,0 +1,80 @@
+import unittest
+import os
+import tempfile
+import time
+import pandas as pd
+import pandas.testing as pd_testing
+from cache import DatasetCache, evict_files, fingerprint, save_npz, load_npz
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Create a temporary cache directory and a dataframe with every kind of column the loader produces"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DatasetCache(self.directory.name)
+        self.df = pd.DataFrame({
+            'visitor_uuid': pd.array(['a', 'b', None, 'a'], dtype='str'),
+            'visitor_username': [None, None, None, None],
+            'visitor_country': pd.Categorical(['GB', 'US', None, 'GB']),
+            'event_readtime': pd.array([1200, None, 3, None], dtype='Int32'),
+            'ts': [1, 2, 3, 4],
+        })
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_npz_round_trip(self):
+        """Test dataframe survives being written to and read from an npz archive"""
+        path = os.path.join(self.directory.name, 'frame.npz')
+        save_npz(self.df, path)
+        pd_testing.assert_frame_equal(load_npz(path), self.df)
+
+    def test_load_missing_key(self):
+        """Test unknown keys are a cache miss"""
+        self.assertIsNone(self.cache.load('abcd'))
+
+    def test_store_and_load(self):
+        """Test stored dataframe is returned for the same key, unless rebuilding"""
+        self.cache.store('abcd', self.df)
+        pd_testing.assert_frame_equal(self.cache.load('abcd'), self.df)
+        self.assertIsNone(DatasetCache(self.directory.name, rebuild=True).load('abcd'))
+
+    def test_fingerprint_changes_with_file(self):
+        """Test fingerprint depends on file contents and parsing options"""
+        path = os.path.join(self.directory.name, 'data.json')
+        with open(path, 'w') as f:
+            f.write('{"ts": 1}\n')
+        before = fingerprint(path)
+        self.assertNotEqual(before, fingerprint(path, ('visitor_uuid',)))
+        with open(path, 'a') as f:
+            f.write('{"ts": 2}\n')
+        self.assertNotEqual(before, fingerprint(path))
+
+    def test_evict_least_recently_used(self):
+        """Test eviction removes the least recently used snapshot first"""
+        for key in ('one', 'two', 'three'):
+            self.cache.store(key, self.df)
+            # Modification times need to differ for the ordering to be meaningful
+            time.sleep(0.01)
+        # Reading 'one' makes 'two' the least recently used snapshot
+        self.cache.load('one')
+        self.cache.max_bytes = 2 * os.path.getsize(os.path.join(self.directory.name, 'one' + self.cache.extension))
+        self.cache.evict(keep='three')
+        self.assertIsNone(self.cache.load('two'))
+        self.assertIsNotNone(self.cache.load('one'))
+        self.assertIsNotNone(self.cache.load('three'))
+
+    def test_evict_companions(self):
+        """Test an evicted url body takes its headers with it, so no header is left pointing at a missing body"""
+        for key in ('old', 'new'):
+            for extension, size in (('.body', 1000), ('.json', 10)):
+                with open(os.path.join(self.directory.name, key + extension), 'wb') as f:
+                    f.write(b'x' * size)
+            time.sleep(0.01)
+        evict_files(self.directory.name, ('.body',), 1500, keep='new', companions=('.json',))
+        self.assertEqual(['new.body', 'new.json'], sorted(os.listdir(self.directory.name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
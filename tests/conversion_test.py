@@ -54,6 +54,40 @@ class ConversionTest(unittest.TestCase):
         self.assertDataFrameEqual(continent_code, expected_df,
                                   "visitor_country should be 'EU', 'AS', 'AS'")
 
+    def test_map_filtered_frame(self):
+        """Test the 'index' column counts rows from 0, whatever the index of a filtered dataframe"""
+        filtered = self.before_map_country[self.before_map_country.visitor_country != 'AF']
+        data = {'index': [0, 1], 'visitor_country': ['Europe', 'Asia']}
+        self.assertDataFrameEqual(self.convert.map_to_continent_code(filtered), pd.DataFrame.from_dict(data), None)
+        codes = pd.DataFrame({'visitor_country': ['EU', 'AS']}, index=[5, 9])
+        self.assertDataFrameEqual(self.convert.map_to_continent_name(codes), pd.DataFrame.from_dict(data), None)
+
+    def test_to_continent_code_many(self):
+        """Test batch conversion gives the same codes as converting one at a time, for plain and categorical input"""
+        countries = ['GB', 'US', None, 'CN', 'GB', 'AF']
+        expected = ['EU', 'NA', None, 'AS', 'EU', 'AS']
+        for values in (countries, pd.Series(countries, dtype='category')):
+            self.assertEqual(expected, list(self.convert.to_continent_code_many(values)))
+
+    def test_to_continent_code_many_unknown(self):
+        """Test unknown country codes raise by default, and become None when coerced"""
+        countries = ['GB', 'XX', 'gb', 'ABC', None]
+        self.assertRaises(KeyError, self.convert.to_continent_code_many, countries)
+        self.assertEqual(['EU', None, None, None, None],
+                         list(self.convert.to_continent_code_many(countries, errors='coerce')))
+        self.assertRaises(ValueError, self.convert.to_continent_code_many, countries, errors='ignore')
+
+    def test_to_continent_name_many(self):
+        """Test batch conversion of continent codes to names"""
+        self.assertEqual(['Europe', 'Asia', None], list(self.convert.to_continent_name_many(['EU', 'AS', None])))
+        self.assertRaises(KeyError, self.convert.to_continent_name_many, ['EU', 'XX'])
+
+    def test_table_matches_dictionary(self):
+        """Test the lookup table holds every country of the dictionary"""
+        countries = list(self.convert._country_to_continent)
+        self.assertEqual(list(self.convert._country_to_continent.values()),
+                         list(self.convert.to_continent_code_many(countries)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import random
+import numpy as np
+import pandas as pd
+import cooccurrence
+from cooccurrence import Cooccurrence
+from readindex import ReadIndex
+
+
+def events(n=2000, seed=7) -> pd.DataFrame:
+    """Random read events over a few readers and documents, with some impressions, stream reads and NaN docs"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        rows.append({'visitor_uuid': f'user{rng.randrange(60):04d}',
+                     'subject_doc_id': rng.choice([f'doc{rng.randrange(40):04d}'] * 20 + [None]),
+                     'subject_type': 'doc', 'event_type': rng.choice(['read'] * 4 + ['impression']),
+                     'env_type': rng.choice(['reader'] * 3 + ['stream'])})
+    return pd.DataFrame(rows).astype({'subject_type': 'category', 'event_type': 'category', 'env_type': 'category'})
+
+
+def expected_counts(df, doc_uuid, exclude=()) -> dict:
+    """Count the documents of every reader of doc_uuid one by one, the way Model.counter does"""
+    reads = df[(df.subject_type == 'doc') & (df.event_type == 'read')]
+    readers = reads.loc[reads.subject_doc_id == doc_uuid, 'visitor_uuid'].unique()
+    in_reader = reads[(reads.env_type == 'reader') & reads.subject_doc_id.notna()]
+    records = {}
+    for reader in readers:
+        if reader in exclude:
+            continue
+        for document in in_reader.loc[in_reader.visitor_uuid == reader, 'subject_doc_id'].unique():
+            if document != doc_uuid:
+                records[document] = records.get(document, 0) + 1
+    return records
+
+
+class CooccurrenceTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.df = events()
+        self.engine = Cooccurrence(ReadIndex(self.df))
+
+    def test_same_counts_as_scanning(self):
+        """Test every document's row matches counting its readers' documents directly"""
+        for document in self.df.subject_doc_id.dropna().unique():
+            with self.subTest(document=document):
+                self.assertEqual(expected_counts(self.df, document), self.engine.also_likes(document))
+
+    def test_excluded_reader(self):
+        """Test excluding a reader takes off exactly their reads, and only if they read the document"""
+        document = 'doc0003'
+        reader = self.engine.readers(document)[0]
+        self.assertEqual(expected_counts(self.df, document, [reader]), self.engine.also_likes(document, [reader]))
+        # Someone who never read the document, or does not exist, changes nothing
+        outsider = next(user for user in self.engine.index.reader_ids if user not in self.engine.readers(document))
+        self.assertEqual(self.engine.also_likes(document), self.engine.also_likes(document, [outsider, 'nobody']))
+
+    def test_top(self):
+        """Test top k is ordered by count, then document ID"""
+        counts = self.engine.also_likes('doc0005')
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:5]
+        self.assertEqual(expected, self.engine.top('doc0005', k=5))
+
+    def test_unknown_document(self):
+        """Test unknown documents raise the same error as Model.readers_of_document"""
+        self.assertRaises(ValueError, self.engine.also_likes, 'missing')
+
+    def entries(self, matrix) -> dict:
+        """Non zero entries of a CSR matrix, by pair of document IDs"""
+        ids = self.engine.index.document_ids
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        return {(ids[d], ids[e]): int(count) for d, e, count in zip(rows, matrix.indices, matrix.data)}
+
+    def test_numpy_product(self):
+        """Test the numpy product counts, for every pair of documents, the readers of one who read the other"""
+        df = self.df
+        reads = df[(df.subject_type == 'doc') & (df.event_type == 'read') & df.subject_doc_id.notna()]
+        expected = {}
+        for _, rows in reads.groupby('visitor_uuid'):
+            read_any = set(rows.subject_doc_id)
+            read_in_reader = set(rows.loc[rows.env_type == 'reader', 'subject_doc_id'])
+            for pair in ((d, e) for d in read_any for e in read_in_reader):
+                expected[pair] = expected.get(pair, 0) + 1
+        product = cooccurrence._product(self.engine.readers_of, self.engine.reads, len(self.engine.index.document_ids))
+        self.assertEqual(expected, self.entries(product))
+
+    @unittest.skipUnless(cooccurrence.sparse is not None, 'scipy is not installed')
+    def test_scipy_matches_numpy(self):
+        """Test the scipy product in use gives the same matrix as the numpy one"""
+        product = cooccurrence._product(self.engine.readers_of, self.engine.reads, len(self.engine.index.document_ids))
+        for expected, actual in zip(product[:3], self.engine.counts[:3]):
+            np.testing.assert_array_equal(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,14 @@
 import unittest
+import bz2
+import gzip
+import lzma
 import data
+import decoders
+import json
+import os
+import tempfile
 import pandas as pd
+import pandas.testing as pd_testing
 
 
 class DataTest(unittest.TestCase):
@@ -32,5 +40,105 @@ class DataTest(unittest.TestCase):
         self.assertEqual((102401, 31), self.b.shape, "Should be (102401, 31")
 
 
+class ChunkedLoaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        """Write a small JSON lines file with a field that only some events have"""
+        self.events = [{'visitor_uuid': f'user{i % 7}', 'subject_doc_id': f'doc{i % 5}', 'event_type': 'read',
+                        'visitor_country': 'GB', 'ts': i} for i in range(25)]
+        self.events[3]['event_readtime'] = 1200
+        handle, self.file = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as f:
+            for event in self.events:
+                f.write(json.dumps(event) + '\n')
+
+    def tearDown(self) -> None:
+        os.remove(self.file)
+
+    def test_chunks_match_single_frame(self):
+        """Test chunked parsing gives the same dataframe as parsing everything at once"""
+        expected = pd.DataFrame(self.events)
+        pd_testing.assert_frame_equal(data.get_data(self.file, chunksize=4), expected)
+
+    def test_column_projection(self):
+        """Test only the requested columns are kept, in order, with missing fields as NaN"""
+        df = data.get_data(self.file, columns=('visitor_uuid', 'event_readtime'), chunksize=10)
+        self.assertEqual(['visitor_uuid', 'event_readtime'], list(df.columns))
+        self.assertEqual(25, len(df))
+        self.assertEqual(1, df.event_readtime.notna().sum())
+
+    def test_decoders_agree(self):
+        """Test every installed decoder backend gives the same dataframe"""
+        expected = data.get_data(self.file, columns=data.MODEL_COLUMNS, decoder='stdlib')
+        for name in decoders.DECODERS:
+            with self.subTest(decoder=name):
+                df = data.get_data(self.file, columns=data.MODEL_COLUMNS, chunksize=6, decoder=name)
+                pd_testing.assert_frame_equal(df, expected)
+
+    def test_unknown_decoder(self):
+        """Test asking for a backend that does not exist"""
+        self.assertRaises(ValueError, decoders.get_decoder, 'abcd')
+
+    def test_schema(self):
+        """Test schema columns are cast and categories are merged across chunks"""
+        df = data.get_data(self.file, columns=data.MODEL_COLUMNS, chunksize=4, schema=data.SCHEMA)
+        self.assertIsInstance(df.event_type.dtype, pd.CategoricalDtype)
+        self.assertEqual(['GB'], list(df.visitor_country.cat.categories))
+        self.assertEqual('Int32', df.event_readtime.dtype)
+        self.assertEqual(1200, df.event_readtime[3])
+        # Chunks where a field is always missing must not break merging the categories
+        self.assertEqual(25, df.env_type.isna().sum())
+
+    def test_category_mask(self):
+        """Test category masks match plain comparison and that unknown values match nothing"""
+        df = data.get_data(self.file, columns=data.MODEL_COLUMNS, chunksize=4, schema=data.SCHEMA)
+        self.assertEqual(25, data.category_mask(df.event_type, 'read').sum())
+        self.assertFalse(data.category_mask(df.env_type, 'reader').any())
+        self.assertEqual(list(df.visitor_uuid == 'user1'), list(data.category_mask(df.visitor_uuid, 'user1')))
+
+    def test_compressed_files(self):
+        """Test gzip, bzip2 and xz files are detected by their magic bytes and read like the plain file"""
+        expected = data.get_data(self.file)
+        with open(self.file, 'rb') as f:
+            raw = f.read()
+        for module in (gzip, bz2, lzma):
+            with self.subTest(compression=module.__name__):
+                # No telling extension, so detection has to rely on the content
+                handle, compressed = tempfile.mkstemp(suffix='.json')
+                with os.fdopen(handle, 'wb') as f:
+                    f.write(module.compress(raw))
+                try:
+                    pd_testing.assert_frame_equal(data.get_data(compressed, chunksize=4), expected)
+                finally:
+                    os.remove(compressed)
+
+    def test_split_ranges(self):
+        """Test byte ranges cover the file without gaps and start on line boundaries"""
+        ranges = data.split_ranges(self.file, 4)
+        self.assertEqual(4, len(ranges))
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(os.path.getsize(self.file), ranges[-1][1])
+        with open(self.file, 'rb') as f:
+            content = f.read()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(b'\n', content[start - 1:start])
+
+    def test_parallel_matches_serial(self):
+        """Test parsing byte ranges in worker processes gives the same dataframe as the serial path"""
+        for schema in (None, data.SCHEMA):
+            with self.subTest(schema=schema):
+                serial = data.get_data(self.file, columns=data.MODEL_COLUMNS, chunksize=4, schema=schema)
+                parallel = data.get_data(self.file, columns=data.MODEL_COLUMNS, chunksize=4, schema=schema,
+                                         workers=3)
+                pd_testing.assert_frame_equal(parallel, serial)
+
+    def test_empty_file(self):
+        """Test an empty file gives an empty dataframe with the requested columns"""
+        open(self.file, 'w').close()
+        df = data.get_data(self.file, columns=data.MODEL_COLUMNS)
+        self.assertEqual(list(data.MODEL_COLUMNS), list(df.columns))
+        self.assertEqual(0, len(df))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,292 @@
+import unittest
+import functools
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+from unittest import mock
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pandas.testing as pd_testing
+import data
+import download
+from cache import DatasetCache, HttpCache
+from gui.model import Model
+
+# Size of the synthetic dataset served to the download tests. Set ISSUU_TEST_DOWNLOAD_MB=300 to run them against a
+# multi-hundred-MB file.
+DOWNLOAD_MB = float(os.environ.get('ISSUU_TEST_DOWNLOAD_MB', 16))
+
+
+def write_dataset(path: str, megabytes: float):
+    """Write synthetic Issuu events to path until it is about megabytes large"""
+    target = megabytes * 1024 ** 2
+    with open(path, 'w') as f:
+        i = 0
+        while f.tell() < target:
+            event = {'ts': 1393631989 + i, 'visitor_uuid': f'{i % 977:016x}', 'visitor_username': None,
+                     'visitor_useragent': f'Mozilla/5.0 (Windows NT {i % 11})', 'visitor_country': 'GB',
+                     'env_type': 'reader', 'event_type': 'read', 'subject_type': 'doc',
+                     'subject_doc_id': f'{i % 331:032x}-ab12cd34', 'padding': 'x' * (i % 400)}
+            if i % 5 == 0:
+                event['event_readtime'] = i % 9000
+            f.write(json.dumps(event) + '\n')
+            i += 1
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request to stderr"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeHandler(QuietHandler):
+    """Static file handler that also answers single byte range requests, logging each one"""
+    ranges = []
+
+    def end_headers(self):
+        self.send_header('Accept-Ranges', 'bytes')
+        super().end_headers()
+
+    def do_GET(self):
+        header = self.headers.get('Range')
+        if header is None:
+            return super().do_GET()
+        RangeHandler.ranges.append(header)
+        start, end = (int(value) for value in header.split('=')[1].split('-'))
+        with open(self.translate_path(self.path), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(start)
+            body = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Range', f'bytes {start}-{start + len(body) - 1}/{size}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ValidatingHandler(QuietHandler):
+    """Static file handler that sends an ETag and answers If-None-Match, logging the status of each GET"""
+    statuses = []
+
+    def etag(self) -> str:
+        stat = os.stat(self.translate_path(self.path))
+        return f'"{stat.st_size}-{stat.st_mtime_ns}"'
+
+    def end_headers(self):
+        if self.command == 'GET':
+            self.send_header('ETag', self.etag())
+        super().end_headers()
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.etag():
+            ValidatingHandler.statuses.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        ValidatingHandler.statuses.append(200)
+        super().do_GET()
+
+
+class RangeValidatingHandler(RangeHandler, ValidatingHandler):
+    """Static file handler that answers byte ranges and validates ETags"""
+
+
+class LocalServer:
+    """Serve a folder over HTTP on a free local port from a background thread"""
+
+    def __init__(self, directory: str, handler=QuietHandler):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(handler, directory=directory))
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, name: str) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_port}/{name}'
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StreamingDownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Write the synthetic dataset once and serve it"""
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.file = os.path.join(cls.directory.name, 'sample.json')
+        write_dataset(cls.file, DOWNLOAD_MB)
+        write_dataset(os.path.join(cls.directory.name, 'tiny.json'), 0.01)
+        cls.server = LocalServer(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.close()
+        cls.directory.cleanup()
+
+    def test_iter_lines_across_blocks(self):
+        """Test lines cut by block boundaries are put back together"""
+        with open(self.file, 'rb') as f:
+            expected = f.read().split(b'\n')[:-1]
+        with open(self.file, 'rb') as f:
+            self.assertEqual(expected, list(download.iter_lines(f, block_size=1000)))
+
+    def test_same_as_local_file(self):
+        """Test streamed download gives the same dataframe as reading the file from disk"""
+        expected = data.get_data(self.file, columns=data.MODEL_COLUMNS, schema=data.SCHEMA)
+        df = data.get_data_from_url(self.server.url('sample.json'), columns=data.MODEL_COLUMNS, schema=data.SCHEMA,
+                                    block_size=64 * 1024)
+        pd_testing.assert_frame_equal(df, expected)
+
+    def test_peak_memory_bounded(self):
+        """Test the download never holds the whole body in memory"""
+        size = os.path.getsize(self.file)
+        # Warm up first, so modules imported lazily on the first download do not count
+        data.get_data_from_url(self.server.url('tiny.json'), columns=data.MODEL_COLUMNS, schema=data.SCHEMA)
+        tracemalloc.start()
+        try:
+            data.get_data_from_url(self.server.url('sample.json'), columns=data.MODEL_COLUMNS, schema=data.SCHEMA,
+                                   chunksize=2000, block_size=64 * 1024)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Reading the body whole used to need several copies of it, now the parsed frame dominates
+        self.assertLess(peak, size)
+
+
+class RangedDownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Serve the same synthetic dataset from a range capable server and from a plain one"""
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.file = os.path.join(cls.directory.name, 'sample.json')
+        write_dataset(cls.file, 2)
+        cls.ranged_server = LocalServer(cls.directory.name, RangeHandler)
+        cls.plain_server = LocalServer(cls.directory.name)
+        with open(cls.file, 'rb') as f:
+            cls.expected = f.read().split(b'\n')[:-1]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.ranged_server.close()
+        cls.plain_server.close()
+        cls.directory.cleanup()
+
+    def setUp(self) -> None:
+        RangeHandler.ranges.clear()
+
+    def test_probe(self):
+        """Test range support is detected from the Accept-Ranges header"""
+        self.assertEqual((os.path.getsize(self.file), True), download.probe(self.ranged_server.url('sample.json')))
+        self.assertFalse(download.probe(self.plain_server.url('sample.json'))[1])
+
+    def test_segments_realigned_to_lines(self):
+        """Test lines split across segments are put back together, in order"""
+        lines = download.ranged_lines(self.ranged_server.url('sample.json'), threads=4, segment_size=100000)
+        self.assertEqual(self.expected, list(lines))
+        self.assertEqual(-(-os.path.getsize(self.file) // 100000), len(RangeHandler.ranges))
+
+    def test_fallback_without_ranges(self):
+        """Test servers without range support are read over a single stream"""
+        lines = download.ranged_lines(self.plain_server.url('sample.json'), threads=4, segment_size=100000)
+        self.assertEqual(self.expected, list(lines))
+
+    def test_same_as_local_file(self):
+        """Test parallel download gives the same dataframe as reading the file from disk"""
+        expected = data.get_data(self.file, columns=data.MODEL_COLUMNS, schema=data.SCHEMA)
+        with mock.patch.object(download, 'SEGMENT_SIZE', 250000):
+            df = data.get_data_from_url(self.ranged_server.url('sample.json'), columns=data.MODEL_COLUMNS,
+                                        schema=data.SCHEMA, threads=3)
+        pd_testing.assert_frame_equal(df, expected)
+        self.assertGreater(len(RangeHandler.ranges), 1)
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Serve a small dataset from a server that validates ETags, with empty caches"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.served = os.path.join(self.directory.name, 'www')
+        os.makedirs(self.served)
+        self.file = os.path.join(self.served, 'sample.json')
+        write_dataset(self.file, 0.5)
+        self.server = LocalServer(self.served, ValidatingHandler)
+        self.http_cache = HttpCache(os.path.join(self.directory.name, 'http'))
+        self.cache = DatasetCache(os.path.join(self.directory.name, 'snapshots'))
+        ValidatingHandler.statuses.clear()
+
+    def tearDown(self) -> None:
+        self.server.close()
+        self.directory.cleanup()
+
+    def load(self):
+        return data.get_data_from_url(self.server.url('sample.json'), columns=data.MODEL_COLUMNS, schema=data.SCHEMA,
+                                      cache=self.cache, http_cache=self.http_cache)
+
+    def test_not_modified_uses_local_copy(self):
+        """Test a second load sends the ETag back and reuses the local copy on 304"""
+        first = self.load()
+        second = self.load()
+        self.assertEqual([200, 304], ValidatingHandler.statuses)
+        pd_testing.assert_frame_equal(first, second)
+        self.assertEqual(expected_rows(self.file), len(second))
+
+    def test_modified_file_downloaded_again(self):
+        """Test a changed remote file is downloaded again"""
+        self.load()
+        write_dataset(self.file, 0.6)
+        df = self.load()
+        self.assertEqual([200, 200], ValidatingHandler.statuses)
+        self.assertEqual(expected_rows(self.file), len(df))
+
+    def test_parallel_download_cached(self):
+        """Test a cached url load with several threads makes ranged requests, parses them and keeps the body"""
+        self.server.close()
+        self.server = LocalServer(self.served, RangeValidatingHandler)
+        RangeHandler.ranges.clear()
+        expected = data.get_data(self.file, columns=data.MODEL_COLUMNS, schema=data.SCHEMA)
+        with mock.patch.object(download, 'SEGMENT_SIZE', 100000):
+            df = data.get_data_from_url(self.server.url('sample.json'), columns=data.MODEL_COLUMNS,
+                                        schema=data.SCHEMA, threads=4, cache=self.cache, http_cache=self.http_cache)
+        pd_testing.assert_frame_equal(df, expected)
+        self.assertGreater(len(RangeHandler.ranges), 1)
+        # The body was kept while parsing, so the next load is a 304 answered from the parsed snapshot
+        ranges = len(RangeHandler.ranges)
+        pd_testing.assert_frame_equal(self.load(), expected)
+        self.assertEqual(ranges, len(RangeHandler.ranges))
+        self.assertEqual(304, ValidatingHandler.statuses[-1])
+        self.assertEqual(1, len(os.listdir(self.cache.directory)))
+
+    def test_snapshot_survives_revalidation(self):
+        """Test a 304 does not change the local copy, so its parsed snapshot is still found"""
+        self.load()
+        self.load()
+        self.load()
+        self.assertEqual([200, 304, 304], ValidatingHandler.statuses)
+        # A changed fingerprint would have written a second snapshot
+        self.assertEqual(1, len(os.listdir(self.cache.directory)))
+
+    def test_model_keyed_by_content(self):
+        """Test results of a url dataset are keyed by its local copy, so a changed remote file gets a new key"""
+        args = {'url': self.server.url('sample.json'), 'file_name': None, 'task': None, 'document_uuid': None,
+                'user_uuid': None, 'cache_dir': self.directory.name}
+        first = Model(args, '').dataset_key
+        self.assertEqual(first, Model(args, '').dataset_key)
+        write_dataset(self.file, 0.6)
+        self.assertNotEqual(first, Model(args, '').dataset_key)
+        # Without a local copy, every load gets its own key
+        args['no_cache'] = True
+        self.assertNotEqual(Model(args, '').dataset_key, Model(args, '').dataset_key)
+
+
+
+def expected_rows(path: str) -> int:
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import random
+import pandas as pd
+import pandas.testing as pd_testing
+from convert import Convert
+from histograms import CountryCounts, continent_counts, country_counts, top_counts
+from readindex import encode
+
+
+class HistogramsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Random documents and countries, including missing ones and a code that is not a country"""
+        rng = random.Random(5)
+        self.df = pd.DataFrame({
+            'subject_doc_id': [rng.choice(['d1', 'd2', 'd3', None]) for _ in range(500)],
+            'visitor_country': [rng.choice(['GB', 'US', 'FR', 'CN', 'ZZ', None]) for _ in range(500)],
+        }).astype({'visitor_country': 'category'})
+
+    def test_country_counts(self):
+        """Test countries are counted in order of first appearance, without missing values"""
+        counts = country_counts(pd.Series(['US', 'GB', None, 'US', 'FR', 'GB', 'US']))
+        self.assertEqual({'US': 3, 'GB': 2, 'FR': 1}, counts.to_dict())
+        self.assertEqual(['US', 'GB', 'FR'], list(counts.index))
+
+    def test_continent_counts(self):
+        """Test country counts are summed per continent and unknown codes left out"""
+        counts = pd.Series({'FR': 2, 'US': 3, 'GB': 4, 'ZZ': 5})
+        self.assertEqual({'Europe': 6, 'North America': 3}, continent_counts(counts, Convert()).to_dict())
+
+    def test_top_counts(self):
+        """Test counts are sorted largest first, ties in order, and the tail summed into one entry"""
+        counts = pd.Series({'US': 1, 'GB': 3, 'FR': 1, 'CN': 2, 'IN': 1})
+        self.assertEqual({'GB': 3, 'CN': 2, 'Other': 3}, top_counts(counts, 2).to_dict())
+        self.assertEqual(['GB', 'CN', 'US', 'FR', 'IN'], list(top_counts(counts).index))
+        self.assertEqual(counts.sum(), top_counts(counts, 1).sum())
+        self.assertEqual(5, len(top_counts(counts, 5)))
+        # A value labelled Other is summed into the Other entry
+        counts = pd.Series({'US': 1, 'Other': 4, 'FR': 2, 'IN': 1})
+        self.assertEqual({'FR': 2, 'Other': 6}, top_counts(counts, 1).to_dict())
+
+    def test_precomputed_same_as_rows(self):
+        """Test the precomputed table gives the counts of the rows of each document, in the same order"""
+        codes, ids = encode(self.df['subject_doc_id'])
+        table = CountryCounts(codes, self.df['visitor_country'])
+        for code, document in enumerate(ids):
+            with self.subTest(document=document):
+                expected = country_counts(self.df.loc[self.df.subject_doc_id == document, 'visitor_country'])
+                pd_testing.assert_series_equal(expected, table.countries(code))
+        self.assertEqual(0, len(table.countries(-1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
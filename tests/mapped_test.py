@@ -0,0 +1,62 @@
+import unittest
+import json
+import mmap
+import os
+import tempfile
+import numpy as np
+import data
+import mapped
+
+
+class MappedTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Convert a small JSON lines file into the mapped format"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'events.json')
+        with open(self.file, 'w') as f:
+            for i in range(30):
+                event = {'visitor_uuid': f'user{i % 7}', 'subject_doc_id': f'doc{i % 5}', 'event_type': 'read',
+                         'subject_type': 'doc', 'env_type': 'reader', 'visitor_country': ['GB', 'US'][i % 2],
+                         'visitor_useragent': 'Mozilla/5.0'}
+                if i % 4 == 0:
+                    event['event_readtime'] = 100 * i
+                f.write(json.dumps(event) + '\n')
+        self.mapped_dir = mapped.convert(self.file, os.path.join(self.directory.name, 'events.mapped'))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_is_mapped(self):
+        """Test only converted folders are recognised"""
+        self.assertTrue(mapped.is_mapped(self.mapped_dir))
+        self.assertFalse(mapped.is_mapped(self.file))
+        self.assertFalse(mapped.is_mapped(self.directory.name))
+
+    def test_same_values_as_json(self):
+        """Test mapped dataset holds the same values as the parsed JSON file"""
+        expected = data.get_data(self.file, columns=data.MODEL_COLUMNS, schema=data.SCHEMA)
+        df = mapped.load(self.mapped_dir)
+        self.assertEqual(list(expected.columns), list(df.columns))
+        for column in expected.columns:
+            self.assertEqual(list(expected[column].astype(object)), list(df[column].astype(object)), column)
+
+    @staticmethod
+    def backed_by_file(array) -> bool:
+        """Follow the chain of array views down to its buffer"""
+        while array is not None:
+            if isinstance(array, (np.memmap, mmap.mmap)):
+                return True
+            array = getattr(array, 'base', None)
+        return False
+
+    def test_columns_are_memory_mapped(self):
+        """Test the dataframe wraps the mapped files instead of copies"""
+        df = mapped.load(self.mapped_dir)
+        self.assertTrue(self.backed_by_file(df.visitor_uuid.array.codes))
+        self.assertTrue(self.backed_by_file(df.event_readtime.array._data))
+        self.assertEqual(30, data.category_mask(df.event_type, 'read').sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+from memo import ResultCache, cached, sizeof
+
+
+class Queries:
+    """Object with the attributes the cached decorator expects, counting how often each query runs"""
+
+    def __init__(self, cache):
+        self.results = cache
+        self.dataset_key = 'first'
+        self.calls = 0
+
+    @cached
+    def square(self, x, offset=0):
+        self.calls += 1
+        if x < 0:
+            raise ValueError("Negative")
+        return [x * x + offset]
+
+
+class MemoTest(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        """Test a cached key is a hit and counts are kept"""
+        cache = ResultCache()
+        self.assertEqual((False, None), cache.get('a'))
+        cache.put('a', 1)
+        self.assertEqual((True, 1), cache.get('a'))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_least_recently_used_evicted(self):
+        """Test the entry budget evicts the least recently used key"""
+        cache = ResultCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual([True, False, True], [cache.get(key)[0] for key in 'abc'])
+
+    def test_byte_budget(self):
+        """Test the byte budget evicts old entries and never keeps a result larger than itself"""
+        array = np.zeros(100, dtype=np.int64)
+        cache = ResultCache(max_bytes=1500)
+        cache.put('a', array)
+        cache.put('b', array.copy())
+        self.assertEqual(1, len(cache))
+        self.assertEqual(800, cache.size)
+        cache.put('c', np.zeros(1000))
+        self.assertFalse(cache.get('c')[0])
+        cache.clear()
+        self.assertEqual((0, 0), (len(cache), cache.size))
+
+    def test_sizeof(self):
+        """Test sizes of dataframes and containers include their contents"""
+        df = pd.DataFrame({'a': np.arange(1000)})
+        self.assertGreaterEqual(sizeof(df), 8000)
+        self.assertGreater(sizeof({'key': 'x' * 1000}), 1000)
+
+    def test_cached_method(self):
+        """Test equivalent calls share an entry, the dataset is part of the key, and errors are not cached"""
+        queries = Queries(ResultCache())
+        self.assertEqual([4], queries.square(2))
+        self.assertEqual([4], queries.square(x=2, offset=0))
+        self.assertEqual(1, queries.calls)
+        # Callers get a copy, so modifying it leaves the cached result unchanged
+        queries.square(2).append(5)
+        self.assertEqual([4], queries.square(2))
+        queries.dataset_key = 'second'
+        queries.square(2)
+        self.assertEqual(2, queries.calls)
+        self.assertRaises(ValueError, queries.square, -1)
+        self.assertRaises(ValueError, queries.square, -1)
+        self.assertEqual(4, queries.calls)
+
+    def test_disabled(self):
+        """Test no result is kept with a budget of 0 entries"""
+        queries = Queries(ResultCache(max_entries=0))
+        queries.square(3)
+        queries.square(3)
+        self.assertEqual(2, queries.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import unittest
+import json
+import os
+import tempfile
+import matplotlib
+import pandas.testing as pd_testing
+
+matplotlib.use('Agg')
+from gui.model import Model
+
+
+def event(visitor, document, event_type='read', env_type='reader', **fields):
+    """One Issuu event with the fields the Model uses"""
+    return dict({'visitor_uuid': visitor, 'subject_doc_id': document, 'subject_type': 'doc', 'event_type': event_type,
+                 'env_type': env_type, 'visitor_country': 'GB', 'visitor_useragent': 'Mozilla/5.0'}, **fields)
+
+
+# Readers u1, u2 and u3 read document aaaa0001. Between them they also read bbbb0002 (twice) and cccc0003 (once).
+EVENTS = [
+    event('u1', 'aaaa0001'), event('u1', 'bbbb0002'), event('u1', 'aaaa0001'),
+    event('u2', 'aaaa0001'), event('u2', 'bbbb0002'), event('u2', 'cccc0003'),
+    event('u3', 'aaaa0001'),
+    event('u4', 'cccc0003'), event('u4', 'dddd0004', event_type='impression'),
+    event('u5', 'aaaa0001', env_type='stream'),
+    # Same last four characters as bbbb0002, but a different document
+    event('u4', 'ffff0002'),
+    event('u1', None, event_type='pagereadtime', event_readtime=3000),
+    event('u2', None, event_type='pagereadtime', event_readtime=1000),
+]
+
+
+class ModelTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Write the events to a temporary file and load it without the dataset cache"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'sample_13_lines.json')
+        with open(self.file, 'w') as f:
+            for line in EVENTS:
+                f.write(json.dumps(line) + '\n')
+        self.args = {'url': None, 'file_name': self.file, 'task': '5d', 'document_uuid': None, 'user_uuid': None,
+                     'sorter': None, 'no_cache': True}
+        self.model = Model(self.args, '')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_readers_of_document(self):
+        """Test every distinct reader is returned once, whatever the environment"""
+        self.assertEqual(['u1', 'u2', 'u3', 'u5'], self.model.readers_of_document('aaaa0001'))
+        self.assertRaises(ValueError, self.model.readers_of_document, 'dddd0004')
+
+    def test_documents_read_by_user(self):
+        """Test only documents read in the reader environment are returned"""
+        self.assertEqual(['aaaa0001', 'bbbb0002', 'cccc0003'], self.model.documents_read_by_user('u2'))
+        self.assertRaises(ValueError, self.model.documents_read_by_user, 'u5')
+
+    def test_counter_excludes_input_document_and_user(self):
+        """Test also likes counts skip the input document and the input user's reads"""
+        readers = ['u1', 'u2', 'u3']
+        self.assertEqual({'bbbb0002': 2, 'cccc0003': 1}, self.model.counter(readers, 'aaaa0001'))
+        self.assertEqual({'bbbb0002': 1}, self.model.counter(readers, 'aaaa0001', 'u2'))
+
+    def test_counter_tells_apart_same_suffix(self):
+        """Test documents ending with the same characters are counted separately"""
+        readers = self.model.readers_of_document('cccc0003')
+        self.assertEqual({'aaaa0001': 1, 'bbbb0002': 1, 'ffff0002': 1}, self.model.counter(readers, 'cccc0003'))
+
+    def test_counter_from_cooccurrence(self):
+        """Test the precomputed co-occurrence counts give the same also likes counts"""
+        model = Model(dict(self.args, cooccurrence=True), '')
+        for document in ('aaaa0001', 'cccc0003'):
+            readers = model.readers_of_document(document)
+            for user in (None, 'u2', 'u4', 'u5'):
+                with self.subTest(document=document, user=user):
+                    self.assertEqual(self.model.counter(readers, document, user), model.counter(readers, document, user))
+
+    def test_also_likes_graph_keeps_documents_apart(self):
+        """Test documents ending with the same characters get their own nodes and longer labels"""
+        path = self.model.write_also_likes('cccc0003', path=os.path.join(self.directory.name, 'also_likes.gv'))
+        with open(path) as f:
+            source = f.read()
+        self.assertIn('label="b0002"', source)
+        self.assertIn('label="f0002"', source)
+
+    def test_document_id_validation(self):
+        """Test any event about a document makes it valid, unknown documents raise KeyError"""
+        self.model.document_id = 'dddd0004'
+        self.assertEqual('dddd0004', self.model.document_id)
+        self.assertRaises(KeyError, setattr, self.model, 'document_id', 'eeee0005')
+        self.assertRaises(ValueError, setattr, self.model, 'document_id', None)
+
+    def test_document_rows(self):
+        """Test the rows of a document are the ones a full scan finds, sliced once for consecutive views"""
+        df = self.model.df
+        for document in ('aaaa0001', 'cccc0003', 'missing'):
+            with self.subTest(document=document):
+                pd_testing.assert_frame_equal(df[df.subject_doc_id == document], self.model.document_rows(document))
+        self.model.document_id = 'aaaa0001'
+        self.assertIs(self.model.document_rows(), self.model.document_rows('aaaa0001'))
+
+    def test_precomputed_histograms(self):
+        """Test the precomputed country table gives the same country and continent counts"""
+        model = Model(dict(self.args, precompute_histograms=True), '')
+        for document in ('aaaa0001', 'dddd0004'):
+            with self.subTest(document=document):
+                pd_testing.assert_series_equal(self.model.country_counts(document), model.country_counts(document))
+                pd_testing.assert_series_equal(self.model.continent_counts(document),
+                                               model.continent_counts(document))
+        self.assertEqual({'Europe': 5}, model.continent_counts('aaaa0001').to_dict())
+
+    def test_top_readers(self):
+        """Test readers are ranked by total read time in seconds, keeping only the first n"""
+        top_readers = self.model.view_top_readers(n=2)
+        self.assertEqual(['visitor_uuid', 'read time (seconds)'], list(top_readers.columns))
+        self.assertEqual([['u1', 3.0], ['u2', 1.0]], top_readers.values.tolist())
+        self.assertEqual(5, len(self.model.view_top_readers(n=50)))
+        self.assertRaises(ValueError, self.model.view_top_readers, 0)
+
+    def test_short_browsers_leave_dataset_unchanged(self):
+        """Test plotting short browser names does not add a column to the dataset"""
+        columns = list(self.model.df.columns)
+        self.model.view_short_browsers()
+        self.assertEqual(columns, list(self.model.df.columns))
+
+    def test_indexes_rebuilt_after_select_data(self):
+        """Test switching dataset drops the indexes of the old one"""
+        self.model.readers_of_document('aaaa0001')
+        other = os.path.join(self.directory.name, 'sample_1_lines.json')
+        with open(other, 'w') as f:
+            f.write(json.dumps(event('u9', 'eeee0005')) + '\n')
+        self.model.select_data(other)
+        self.assertEqual(['u9'], self.model.readers_of_document('eeee0005'))
+        self.assertRaises(ValueError, self.model.readers_of_document, 'aaaa0001')
+
+    def test_failed_select_data(self):
+        """Test a failed load keeps the current dataset, or leaves an empty one with --single-buffer"""
+        missing = os.path.join(self.directory.name, 'missing.json')
+        self.assertRaises(OSError, self.model.select_data, missing)
+        self.assertEqual(self.file, self.model.current_filename)
+        self.assertEqual(4, len(self.model.readers_of_document('aaaa0001')))
+        model = Model(dict(self.args, single_buffer=True), '')
+        # A path that does not exist is refused before the current dataset is released
+        self.assertRaises(OSError, model.select_data, missing)
+        self.assertEqual(self.file, model.current_filename)
+        self.assertEqual(4, len(model.readers_of_document('aaaa0001')))
+        broken = os.path.join(self.directory.name, 'broken.json')
+        with open(broken, 'w') as f:
+            f.write('{"visitor_uuid": \n')
+        self.assertRaises(ValueError, model.select_data, broken)
+        self.assertIsNone(model.current_filename)
+        self.assertRaises(ValueError, model.readers_of_document, 'aaaa0001')
+        model.select_data(self.file)
+        self.assertEqual(4, len(model.readers_of_document('aaaa0001')))
+
+    def test_load_and_swap_data(self):
+        """Test a dataset loaded next to the current one only replaces it once swapped in"""
+        other = os.path.join(self.directory.name, 'sample_1_lines.json')
+        with open(other, 'w') as f:
+            f.write(json.dumps(event('u9', 'eeee0005')) + '\n')
+        dataset = self.model.load_data(other)
+        self.assertEqual(4, len(self.model.readers_of_document('aaaa0001')))
+        self.model.swap_data(dataset)
+        self.assertEqual(other, self.model.current_filename)
+        self.assertIs(dataset.indexes[0], self.model.index)
+        self.assertEqual(['u9'], self.model.readers_of_document('eeee0005'))
+
+    def test_cache_size_shared(self):
+        """Test --cache-size is split between parsed snapshots and url bodies"""
+        model = Model(dict(self.args, no_cache=False, cache_dir=os.path.join(self.directory.name, 'cache'),
+                           cache_size=10), '')
+        self.assertEqual(10 * 1024 ** 2, model.cache.max_bytes + model.http_cache.max_bytes)
+
+    def test_results_cached_until_select_data(self):
+        """Test repeated queries are answered from the result cache, which select_data empties"""
+        top = self.model.view_top_documents('aaaa0001')
+        misses = self.model.results.misses
+        self.assertEqual(top, self.model.view_top_documents('aaaa0001', k=10))
+        self.assertEqual(misses, self.model.results.misses)
+        self.assertEqual(1, self.model.results.hits)
+        # Modifying a returned result does not change the cached one
+        self.model.readers_of_document('aaaa0001').clear()
+        self.assertEqual(['u1', 'u2', 'u3', 'u5'], sorted(self.model.readers_of_document('aaaa0001')))
+        self.model.select_data(self.file)
+        self.assertEqual(0, len(self.model.results))
+
+
+if __name__ == '__main__':
+    unittest.main()
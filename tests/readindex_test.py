@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+import pandas as pd
+from readindex import ReadIndex, abbreviate, csr_from_pairs, encode, gather
+
+
+class ReadIndexTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.df = pd.DataFrame({
+            'visitor_uuid': ['u1', 'u2', 'u1', 'u3', 'u2', None, 'u3', 'u1'],
+            'subject_doc_id': ['d2', 'd1', 'd1', 'd2', 'd1', 'd1', None, 'd3'],
+            'subject_type': ['doc'] * 8,
+            'event_type': ['read', 'read', 'read', 'read', 'read', 'read', 'read', 'impression'],
+            'env_type': ['reader', 'reader', 'reader', 'stream', 'reader', 'reader', 'reader', 'reader'],
+        }).astype({'subject_type': 'category', 'event_type': 'category', 'env_type': 'category'})
+        self.index = ReadIndex(self.df)
+
+    def test_encode(self):
+        """Test plain and categorical columns give codes that decode to the same IDs, with -1 for missing ones"""
+        for dtype in ('object', 'category'):
+            with self.subTest(dtype=dtype):
+                codes, ids = encode(self.df['visitor_uuid'].astype(dtype))
+                self.assertEqual(np.int32, codes.dtype)
+                decoded = [None if code < 0 else ids[code] for code in codes]
+                self.assertEqual(['u1', 'u2', 'u1', 'u3', 'u2', None, 'u3', 'u1'], decoded)
+
+    def test_csr_from_pairs(self):
+        """Test duplicate pairs are stored once, with columns sorted or in order of first appearance"""
+        rows, cols = np.array([1, 0, 1, 1]), np.array([2, 1, 0, 2])
+        matrix = csr_from_pairs(rows, cols, (3, 3))
+        self.assertEqual([0, 1, 3, 3], matrix.indptr.tolist())
+        self.assertEqual([1, 0, 2], matrix.indices.tolist())
+        self.assertEqual([1, 1, 1], matrix.data.tolist())
+        self.assertEqual([1, 2, 0], csr_from_pairs(rows, cols, (3, 3), sort=False).indices.tolist())
+        # With counts, the number of times each pair was found
+        self.assertEqual([1, 1, 2], csr_from_pairs(rows, cols, (3, 3), counts=True).data.tolist())
+        self.assertEqual([1, 2, 1], csr_from_pairs(rows, cols, (3, 3), sort=False, counts=True).data.tolist())
+
+    def test_gather(self):
+        """Test rows are concatenated in the requested order, including repeated and empty rows"""
+        matrix = csr_from_pairs(np.array([0, 0, 2, 3]), np.array([5, 6, 7, 8]), (4, 9))
+        self.assertEqual([7, 5, 6, 8, 7], gather(matrix, np.array([2, 0, 1, 3, 2])).tolist())
+        self.assertEqual([], gather(matrix, np.array([], dtype=np.int32)).tolist())
+
+    def test_readers_and_documents(self):
+        """Test who read what, in order of first appearance, ignoring missing IDs and other events"""
+        index = self.index
+        d1, d2 = index.document_code('d1'), index.document_code('d2')
+        self.assertEqual(['u2', 'u1'], list(index.reader_ids[index.readers(d1)]))
+        self.assertEqual(['u1', 'u3'], list(index.reader_ids[index.readers(d2)]))
+        # u3 only read d2 outside the reader, and a document without ID inside it
+        self.assertEqual(['d2', 'd1'], list(index.document_ids[index.documents(index.reader_code('u1'))]))
+        self.assertEqual(0, len(index.documents(index.reader_code('u3'))))
+        self.assertTrue(index.active[index.reader_code('u3')])
+        self.assertEqual(-1, index.document_code('d9'))
+        self.assertEqual([-1, 1], index.reader_codes(['nobody', 'u2']).tolist())
+
+    def test_abbreviate(self):
+        """Test IDs are cut to their last four characters unless that would make two of them look the same"""
+        self.assertEqual(['0001', '0002', '0001'], abbreviate(['aaaa0001', 'bbbb0002', 'aaaa0001']))
+        self.assertEqual(['a0001', 'b0001'], abbreviate(['aaaa0001', 'bbbb0001']))
+        self.assertEqual(['ab', 'ab'], abbreviate(['ab', 'ab']))
+        self.assertEqual([], abbreviate([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
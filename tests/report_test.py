@@ -0,0 +1,71 @@
+import unittest
+import json
+import os
+import tempfile
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+
+matplotlib.use('Agg')
+from gui.model import Model
+from report import Report, read_documents
+from tests.model_test import EVENTS
+
+
+class ReportTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Load the events of the Model tests and report into a temporary folder"""
+        self.directory = tempfile.TemporaryDirectory()
+        file = os.path.join(self.directory.name, 'sample_13_lines.json')
+        with open(file, 'w') as f:
+            for line in EVENTS:
+                f.write(json.dumps(line) + '\n')
+        args = {'url': None, 'file_name': file, 'task': None, 'document_uuid': None, 'user_uuid': None,
+                'no_cache': True}
+        self.model = Model(args, '')
+        self.output = os.path.join(self.directory.name, 'report')
+        self.report = Report(self.model, self.output, formats=('png', 'svg'))
+
+    def tearDown(self) -> None:
+        self.report.close()
+        self.directory.cleanup()
+
+    def test_charts_of_several_documents(self):
+        """Test every chart of every document is written, unknown documents are skipped, and figures reused"""
+        figures = len(plt.get_fignums())
+        paths = self.report.run(['aaaa0001', 'missing', 'cccc0003'], tasks=('2a', '2b', '3b', '6'))
+        for document in ('aaaa0001', 'cccc0003'):
+            for chart in ('countries', 'continents'):
+                for file_format in ('png', 'svg'):
+                    self.assertIn(os.path.join(self.output, f'{document}_{chart}.{file_format}'), paths)
+            self.assertIn(os.path.join(self.output, f'{document}_also_likes.gv'), paths)
+        self.assertIn(os.path.join(self.output, 'short_browsers.png'), paths)
+        self.assertFalse(any('missing' in path for path in paths))
+        self.assertTrue(all(os.path.isfile(path) for path in paths))
+        # One figure per kind of chart, however many documents
+        self.assertEqual(figures + 3, len(plt.get_fignums()))
+
+    def test_empty_counts(self):
+        """Test charts of empty counts are saved without any bar, rather than divided by a zero total"""
+        for counts in (pd.Series([], dtype='int64'), pd.Series({'Chrome': 0})):
+            with self.subTest(counts=counts.to_dict()):
+                self.model.short_browser_counts = lambda: counts
+                paths = self.report.short_browsers()
+                self.assertTrue(all(os.path.isfile(path) for path in paths))
+                self.assertEqual(0, len(self.report._figures['short_browsers'].axes[0].patches))
+
+    def test_unknown_format(self):
+        """Test only formats matplotlib and Graphviz both write are accepted"""
+        self.assertRaises(ValueError, Report, self.model, self.output, ('bmp',))
+
+    def test_read_documents(self):
+        """Test blank lines and duplicates are dropped from the list of documents"""
+        file = os.path.join(self.directory.name, 'ids.txt')
+        with open(file, 'w') as f:
+            f.write('aaaa0001\n\n cccc0003 \naaaa0001\n')
+        self.assertEqual(['aaaa0001', 'cccc0003'], read_documents(file))
+
+
+if __name__ == '__main__':
+    unittest.main()
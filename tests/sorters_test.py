@@ -0,0 +1,45 @@
+import unittest
+import random
+import sorters
+
+
+class SortersTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        """Counts with many ties, inserted in random order"""
+        rng = random.Random(3)
+        documents = [f'{i:04x}' for i in range(5000)]
+        rng.shuffle(documents)
+        self.records = {document: rng.randrange(1, 20) for document in documents}
+
+    def test_same_as_full_sort(self):
+        """Test every sorter keeps exactly the first k entries of the equivalent full sort"""
+        items = list(self.records.items())
+        full = {'key': sorted(items),
+                'desc': sorted(items, key=lambda item: item[1], reverse=True),
+                'count': sorted(items, key=lambda item: (-item[1], item[0]))}
+        for name, expected in full.items():
+            sorter, _ = sorters.get_sorter(name)
+            for k in (1, 10, 6000):
+                with self.subTest(sorter=name, k=k):
+                    self.assertEqual(expected[:k], list(sorter(self.records, k).items()))
+
+    def test_default_and_unknown(self):
+        """Test no name gives the alphabetical sorter and unknown names raise"""
+        self.assertIs(sorters.key, sorters.get_sorter()[0])
+        self.assertRaises(ValueError, sorters.get_sorter, 'random')
+
+    def test_register(self):
+        """Test a registered sorter can be looked up by name"""
+        @sorters.register('ascending', 'ascending on values')
+        def ascending(records, k=10):
+            return dict(sorted(records.items(), key=lambda item: item[1])[:k])
+
+        try:
+            self.assertEqual((ascending, 'ascending on values'), sorters.get_sorter('ascending'))
+        finally:
+            del sorters.SORTERS['ascending']
+
+
+if __name__ == '__main__':
+    unittest.main()
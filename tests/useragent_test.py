@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+import pandas as pd
+from useragent import UserAgentClassifier, browser_name
+
+AGENTS = ['Mozilla/5.0 (Windows NT 6.1)', 'Opera/9.80', None, 'Mozilla/4.0 (compatible)', 'Opera/9.80',
+          'curl/7.30.0', 'Mozilla/5.0 (Windows NT 6.1)']
+
+
+class UserAgentClassifierTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.classifier = UserAgentClassifier()
+        self.expected = [None if agent is None else browser_name(agent) for agent in AGENTS]
+
+    def test_classify(self):
+        """Test every row gets the browser name of its own user agent, and missing ones stay missing"""
+        for dtype in ('object', 'category'):
+            with self.subTest(dtype=dtype):
+                browsers = self.classifier.classify(pd.Series(AGENTS, dtype=dtype, index=range(10, 17)))
+                self.assertEqual(list(range(10, 17)), list(browsers.index))
+                self.assertEqual(self.expected, [None if pd.isna(b) else b for b in browsers])
+
+    def test_counts_in_order_of_appearance(self):
+        """Test counts merge user agents of the same browser and skip missing ones"""
+        counts = self.classifier.counts(pd.Series(AGENTS, dtype='category'))
+        self.assertEqual({'Mozilla': 3, 'Opera': 2, 'curl': 1}, counts.to_dict())
+        self.assertEqual(['Mozilla', 'Opera', 'curl'], list(counts.index))
+
+    def test_parses_distinct_strings_once(self):
+        """Test each distinct user agent is parsed once, even across datasets"""
+        self.classifier.counts(pd.Series(AGENTS * 1000))
+        self.assertEqual(4, self.classifier.parse.cache_info().misses)
+        self.classifier.counts(pd.Series(AGENTS[:2] + ['Safari/537.36'], dtype='category'))
+        self.assertEqual(5, self.classifier.parse.cache_info().misses)
+
+    def test_no_user_agents(self):
+        """Test a column with only missing values gives no counts"""
+        self.assertEqual(0, len(self.classifier.counts(pd.Series([None, np.nan], dtype=object))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from gui.controller import Controller
+from gui.view import View
+from gui.worker import Worker
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() only records callbacks, which run() then calls on the test thread"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, milliseconds, callback):
+        self.scheduled.append(callback)
+
+    def run(self, timeout=5):
+        """Poll until nothing is scheduled any more, like a mainloop would"""
+        deadline = time.monotonic() + timeout
+        while self.scheduled and time.monotonic() < deadline:
+            time.sleep(0.01)
+            self.scheduled.pop(0)()
+
+
+class WorkerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.widget = FakeWidget()
+        self.idle = mock.Mock()
+        self.worker = Worker(self.widget, on_idle=self.idle)
+
+    def tearDown(self) -> None:
+        self.worker.shutdown()
+
+    def test_results_delivered_on_polling_thread(self):
+        """Test computations run in the background and their callbacks, in order, on the thread that polls"""
+        threads, results = [], []
+        for i in range(3):
+            self.worker.submit(lambda i=i: (threads.append(threading.current_thread()), i)[1],
+                               lambda result: results.append((threading.current_thread(), result)))
+        self.widget.run()
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual([(threading.current_thread(), i) for i in range(3)], results)
+        self.assertEqual(0, self.worker.pending)
+        self.idle.assert_called()
+
+    def test_errors_passed_to_on_error(self):
+        """Test expected errors go to on_error, and the worker keeps running after them"""
+        errors, done = [], []
+        self.worker.submit(mock.Mock(side_effect=KeyError('missing')), done.append, on_error=errors.append)
+        self.worker.submit(lambda: 1, done.append)
+        self.widget.run()
+        self.assertEqual(1, len(errors))
+        self.assertIsInstance(errors[0], KeyError)
+        self.assertEqual([1], done)
+
+    def test_unexpected_errors_raised_when_polled(self):
+        """Test other errors are raised on the polling thread rather than lost"""
+        self.worker.submit(mock.Mock(side_effect=RuntimeError('bug')), mock.Mock(), on_error=mock.Mock())
+        self.assertRaises(RuntimeError, self.widget.run)
+
+
+class ControllerTest(unittest.TestCase):
+
+    def test_country_plotted_after_background_count(self):
+        """Test the Controller counts on the worker thread and plots, or shows an error, from the Tk callbacks"""
+        model, view = mock.Mock(), mock.Mock()
+        widget = FakeWidget()
+        view.after = widget.after
+        controller = Controller(model, view)
+        controller.view_country('aaaa0001')
+        view.show_busy.assert_called_once()
+        model.plot_country.assert_not_called()
+        widget.run()
+        self.assertEqual('aaaa0001', model.document_id)
+        model.plot_country.assert_called_once_with(model.country_counts.return_value, 'aaaa0001')
+        view.show_success.assert_called_once()
+
+        # Each plot gets the document of its own request, even once the next one changed the Model's
+        model.plot_country.reset_mock()
+        controller.view_country('bbbb0002')
+        controller.view_country('cccc0003')
+        widget.run()
+        self.assertEqual(['bbbb0002', 'cccc0003'], [call.args[1] for call in model.plot_country.call_args_list])
+
+        model.continent_counts.side_effect = ValueError('No document')
+        controller.view_continent('aaaa0001')
+        widget.run()
+        view.show_error.assert_called_once()
+        model.plot_continent.assert_not_called()
+        controller.close()
+
+    def test_dataset_swapped_after_background_load(self):
+        """Test a new dataset is loaded on the loader thread, then swapped in on the worker thread"""
+        model, view = mock.Mock(args={}), mock.Mock()
+        widget = FakeWidget()
+        view.after = widget.after
+        controller = Controller(model, view)
+        threads = {}
+        model.load_data.side_effect = lambda filename: threads.setdefault('load', threading.current_thread())
+        model.swap_data.side_effect = lambda dataset: threads.setdefault('swap', threading.current_thread())
+        controller.select_data('sample_1_lines.json')
+        widget.run()
+        model.load_data.assert_called_once_with('sample_1_lines.json')
+        model.swap_data.assert_called_once_with(threads['load'])
+        self.assertNotEqual(threads['load'], threads['swap'])
+        view.show_success.assert_called_once()
+        view.show_idle.assert_called_once()
+
+        model.load_data.side_effect = OSError('No such file')
+        controller.select_data('missing.json')
+        widget.run()
+        view.show_error.assert_called_once()
+        model.swap_data.assert_called_once()
+        controller.close()
+
+
+    def test_cancelled_file_dialog(self):
+        """Test cancelling the file browser, which returns '' or (), does not select any dataset"""
+        view = mock.Mock()
+        for cancelled in ('', ()):
+            with self.subTest(cancelled=cancelled), \
+                    mock.patch('gui.view.filedialog.askopenfilename', return_value=cancelled):
+                View.browse_files(view)
+        view.controller.select_data.assert_not_called()
+        with mock.patch('gui.view.filedialog.askopenfilename', return_value='sample_1_lines.json'):
+            View.browse_files(view)
+        view.controller.select_data.assert_called_once_with('sample_1_lines.json')
+
+if __name__ == '__main__':
+    unittest.main()
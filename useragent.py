@@ -0,0 +1,95 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+"""
+Module for classifying user agent strings.
+
+A dataset has millions of events but only a few thousand distinct user agents, so each distinct string is parsed
+once and the result is broadcast back to every row through integer codes. Parsed strings are also kept in a bounded
+LRU cache that outlives any one dataset, so switching to another file mostly hits the cache.
+"""
+
+# Number of distinct user agents remembered across datasets
+CACHE_SIZE = 8192
+
+
+def browser_name(useragent: str) -> str:
+    """
+    Short browser name of a user agent string
+
+    All browser names are followed by a '/' and their version, so the name is everything before the first '/'.
+    """
+    return useragent.split('/')[0]
+
+
+class UserAgentClassifier:
+    """
+    Classify the user agents of a dataset, parsing each distinct string only once
+
+    Parameters
+    ----------
+    parse: func, optional
+        Function from a user agent string to its class. Default is browser_name.
+
+    maxsize: int, optional
+        Size of the LRU cache of parsed strings
+
+    Methods
+    -------
+    classify(useragents: pandas.Series)
+        Returns the class of every row as a categorical series
+
+    counts(useragents: pandas.Series)
+        Returns the number of rows in each class
+    """
+
+    def __init__(self, parse=browser_name, maxsize=CACHE_SIZE):
+        self.parse = lru_cache(maxsize=maxsize)(parse)
+
+    def _codes(self, useragents: pd.Series) -> tuple:
+        """Class code of every row (-1 for missing user agents) and the classes, in order of first appearance"""
+        if isinstance(useragents.dtype, pd.CategoricalDtype):
+            # Already one code per distinct string, no need to hash the rows again
+            codes, strings = np.asarray(useragents.array.codes), useragents.cat.categories
+        else:
+            codes, strings = pd.factorize(useragents)
+        # Only the distinct strings are parsed, then mapped onto classes, which may merge several strings
+        class_codes, classes = pd.factorize(np.array([self.parse(string) for string in strings], dtype=object))
+        class_codes = np.append(class_codes, -1)
+        # -1 indexes the appended -1, so missing user agents stay missing
+        row_codes = class_codes[codes]
+        # Number classes in order of first appearance in the rows, as plotting the raw strings would
+        order = pd.unique(row_codes[row_codes >= 0])
+        remap = np.full(len(classes) + 1, -1, dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        return remap[row_codes], np.asarray(classes, dtype=object)[order]
+
+    def classify(self, useragents: pd.Series) -> pd.Series:
+        """
+        Class of every user agent
+
+        Parameters
+        ----------
+        useragents: pandas.Series
+            User agent strings, plain or categorical, possibly with missing values
+
+        Returns
+        -------
+        pandas.Series
+            Categorical series with the same index, NaN where the user agent is missing
+        """
+        codes, classes = self._codes(useragents)
+        return pd.Series(pd.Categorical.from_codes(codes, classes), index=useragents.index, name=useragents.name)
+
+    def counts(self, useragents: pd.Series) -> pd.Series:
+        """
+        Number of rows in each class, without missing user agents
+
+        Returns
+        -------
+        pandas.Series
+            Counts indexed by class, in order of first appearance
+        """
+        codes, classes = self._codes(useragents)
+        return pd.Series(np.bincount(codes[codes >= 0], minlength=len(classes)), index=classes)